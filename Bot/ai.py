@@ -1,7 +1,6 @@
 import os
 import asyncio
 import logging
-from openai import AsyncOpenAI
 from telegram.ext import ContextTypes
 from typing import Dict, Optional, Any, Tuple, Callable, List
 # Global dictionary to track running AI tasks
@@ -34,6 +33,7 @@ async def run_ai_task(user_id: int, text: str, chat_id: int, context: ContextTyp
             await context.bot.send_message(chat_id=chat_id, text="❌ Server misconfigured: missing GROQ_API_KEY.")
             return
 
+        from openai import AsyncOpenAI
         client = AsyncOpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
 
         working_msg = None
@@ -3,9 +3,11 @@ import os
 import logging
 from datetime import datetime, timezone
 from telegram.ext import (
+    AIORateLimiter,
     ApplicationBuilder,
     CommandHandler,
     CallbackQueryHandler,
+    Defaults,
     MessageHandler,
     filters,
 )
@@ -33,33 +35,63 @@ async def health():
     }
 
 if __name__ == "__main__":
-    application = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    # block=False: every handler runs as its own task, so a slow fetch for
+    # one chat doesn't hold up updates for everyone else.
+    # AIORateLimiter paces every Bot API call against Telegram's global
+    # (30/s) and per-group (20/min) limits and retries on RetryAfter.
+    application = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .defaults(Defaults(block=False))
+        .rate_limiter(AIORateLimiter(
+            overall_max_rate=30,
+            overall_time_period=1,
+            group_max_rate=20,
+            group_time_period=60,
+            max_retries=3,
+        ))
+        .build()
+    )
 
-    # Command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("menu", menu))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("latest", latest_command))
-    application.add_handler(CommandHandler("benefits", benefits_command))
-    application.add_handler(CommandHandler("dashboard", dashboard_command))
-    application.add_handler(CommandHandler("leaderboard", leaderboard_command))
-    application.add_handler(CommandHandler("admin", admin_command))
-    application.add_handler(CommandHandler("ban", ban_command))
-    application.add_handler(CommandHandler("unban", unban_command))
-    application.add_handler(CommandHandler("reset_cooldown", reset_cooldown_command))
-    application.add_handler(CommandHandler("user_stats", user_stats_command))
-    application.add_handler(CommandHandler("export_csv", export_csv_command))
-    application.add_handler(CommandHandler("cancel", cancel_command))
-    application.add_handler(CommandHandler("privacy", privacy_command))
-    application.add_handler(CommandHandler("forcemode", testmode_command))
-    application.add_handler(CommandHandler("reset_all_cooldowns", reset_all_cooldowns_command))
+    # Command handlers: (command name(s), callback)
+    COMMANDS = [
+        ("start", start),
+        ("menu", menu),
+        ("help", help_command),
+        ("latest", latest_command),
+        ("benefits", benefits_command),
+        ("dashboard", dashboard_command),
+        ("leaderboard", leaderboard_command),
+        ("admin", admin_command),
+        ("ban", ban_command),
+        ("unban", unban_command),
+        ("reset_cooldown", reset_cooldown_command),
+        ("user_stats", user_stats_command),
+        ("export_csv", export_csv_command),
+        ("cancel", cancel_command),
+        ("privacy", privacy_command),
+        ("forcemode", testmode_command),
+        ("reset_all_cooldowns", reset_all_cooldowns_command),
+        ("save", save_command),
+        ("saved_list", saved_list_command),
+        ("saved_send", saved_send_command),
+        ("saved_remove", saved_remove_command),
+        ("saved_rename", saved_rename_command),
+    ]
+    for name, callback in COMMANDS:
+        application.add_handler(CommandHandler(name, callback))
 
-    # Callback and message handlers
+    # Callback routes (matched by PTB in order), then the catch-all fallback
+    for pattern, handler in CALLBACK_ROUTES:
+        application.add_handler(CallbackQueryHandler(handler, pattern=pattern))
     application.add_handler(CallbackQueryHandler(callback_handler))
+
+    # Message handlers
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler))
 
-    # Command visibility
-    application.post_init = set_command_visibility
+    # Startup hook (bot username cache + command visibility); shutdown flushes buffered writes
+    application.post_init = post_init
+    application.post_shutdown = post_shutdown
 
     # Init DB
     try:
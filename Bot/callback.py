@@ -1,8 +1,12 @@
 import io
+import re
+import time
 import logging
 import asyncio
+from functools import wraps
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile
 from telegram.ext import ContextTypes
+from telegram.error import BadRequest
 from .settings import *
 from .helpers import *
 from .ui import *
@@ -15,670 +19,590 @@ logger = logging.getLogger(__name__)
 # Global AI tasks dict (needed for cancellation)
 from .ai import ai_tasks
 
-async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-    user = update.effective_user
-    uid = user.id if user else None
-
-    #from helpers import record_user_and_check_ban
-    await record_user_and_check_ban(update, context)
-    data = query.data or ""
-
-    # AI Analysis Button
-    if data.startswith("ai_analyze_"):
-        _, _, plat_acc = data.partition("ai_analyze_")
-        platform, _, account = plat_acc.partition("_")
-
-        badge = get_user_badge(uid)
-
-        if badge['name'] not in ('Diamond', 'Admin'):
-            cooldown_msg = check_and_increment_cooldown(uid)
-            if cooldown_msg:
-                await query.answer("AI limit reached! Invite friends to upgrade.", show_alert=True)
+# (compiled pattern, handler) pairs registered as CallbackQueryHandlers in
+# bot.py, in definition order; filled by the @callback_route decorator below.
+CALLBACK_ROUTES: List[Tuple[re.Pattern, Callable]] = []
+
+def callback_route(pattern: str, admin: bool = False, counts_request: bool = False):
+    """Register a handler for callback data matching pattern.
+
+    The wrapper answers the query, records the user and calls
+    handler(update, context, query, uid, *match_groups). With admin=True
+    non-admins get "Admins only." instead. Only routes marked
+    counts_request bump the user's request counter; plain navigation doesn't.
+    """
+    def decorator(handler_func):
+        @wraps(handler_func)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            query = update.callback_query
+            await query.answer()
+            user = update.effective_user
+            uid = user.id if user else None
+            await record_user_and_check_ban(update, context, count_request=counts_request)
+            if admin and not is_admin(uid):
+                await query.edit_message_text("❌ Admins only.")
                 return
+            groups = context.matches[0].groups() if context.matches else ()
+            return await handler_func(update, context, query, uid, *groups)
+        CALLBACK_ROUTES.append((re.compile(pattern), wrapper))
+        return handler_func
+    return decorator
+
+# AI Analysis Button
+@callback_route(r"^ai_analyze_([^_]+)_(.*)$", counts_request=True)
+async def _cb_ai_analyze(update, context, query, uid, platform, account):
+    badge = await asyncio.to_thread(get_user_badge, uid)
+
+    if badge['name'] not in ('Diamond', 'Admin'):
+        cooldown_msg = await asyncio.to_thread(check_and_increment_cooldown, uid)
+        if cooldown_msg:
+            await query.answer("AI limit reached! Invite friends to upgrade.", show_alert=True)
+            return
 
-        await safe_edit(query, text="🤖 Analyzing with Nigerian fire...")
-
-        posts = context.user_data.get(f"last_ai_context_{platform}_{account}", [])
-        analysis = await call_social_ai(platform, account, posts)
+    await safe_edit(query, text="🤖 Analyzing with Nigerian fire...")
+
+    posts = context.user_data.get(f"last_ai_context_{platform}_{account}", [])
+    analysis = await call_social_ai(platform, account, posts)
+
+    final_text = f"🤖 <b>AI Insight</b>:\n\n{analysis}"
+
+    if badge['name'] in ('Diamond', 'Admin'):
+        final_text += "\n\n💎 <b>You can ask me follow-up questions about these posts!</b>\nJust reply to this message."
+        context.user_data["ai_chat_active"] = {
+            "platform": platform,
+            "account": account,
+            "posts": posts
+        }
+
+    await safe_edit(query, text=final_text, parse_mode="HTML")
+
+# Saved quick send
+@callback_route(r"^saved_sendcb_(\d+)$", counts_request=True)
+async def _cb_saved_send(update, context, query, uid, sid):
+    sid = int(sid)
+    saved = await asyncio.to_thread(get_saved_account, uid, sid)
+    if not saved:
+        await context.bot.edit_message_text(
+            chat_id=query.message.chat.id,
+            message_id=query.message.message_id,
+            text="Saved account not found."
+        )
+        return
 
-        final_text = f"🤖 <b>AI Insight</b>:\n\n{analysis}"
+    await handle_fetch_and_ai(update, context, saved["platform"], saved["account_name"], query)
 
-        if badge['name'] in ('Diamond', 'Admin'):
-            final_text += "\n\n💎 <b>You can ask me follow-up questions about these posts!</b>\nJust reply to this message."
-            context.user_data["ai_chat_active"] = {
-                "platform": platform,
-                "account": account,
-                "posts": posts
-            }
+# Confirm (send) single post
+@callback_route(r"^confirm_post_([^_]+)_(.*)_(\d+)$", counts_request=True)
+async def _cb_confirm_post(update, context, query, uid, platform, account, idx):
+    idx = int(idx)
 
-        await safe_edit(query, text=final_text, parse_mode="HTML")
+    user_data_key = f"pending_posts_{platform}_{account}"
+    pending = context.user_data.get(user_data_key)
+    if not pending or pending.get("index", 0) != idx:
+        logger.info(f"Stale click detected: expected index {pending.get('index', 'None')}, got {idx} for @{account}")
+        await query.answer("Post expired or out of order.", show_alert=True)
+        await send_next_post_with_confirmation(update, context, platform, account)
         return
 
-    # Saved quick send
-    if data.startswith("saved_sendcb_"):
-        _, _, sid_s = data.partition("saved_sendcb_")
-        try:
-            sid = int(sid_s)
-        except:
-            await context.bot.edit_message_text(
-                chat_id=query.message.chat.id,
-                message_id=query.message.message_id,
-                text="Invalid saved id."
-            )
-            return
+    pending["has_sent_single"] = True
+    context.user_data[user_data_key] = pending
+    logger.info("Flag set: has_sent_single=True for %s/%s", platform, account)
 
-        saved = get_saved_account(uid, sid)
-        if not saved:
-            await context.bot.edit_message_text(
+    post = pending["posts"][idx]
+    media_bytes = await download_media(post.get("media_url"))
+    if not media_bytes:
+        try:
+            await context.bot.edit_message_caption(
                 chat_id=query.message.chat.id,
                 message_id=query.message.message_id,
-                text="Saved account not found."
+                caption=(query.message.caption or "") + "\n\n❌ Media failed to load",
+                reply_markup=None
             )
-            return
-
-        await handle_fetch_and_ai(update, context, saved["platform"], saved["account_name"], query)
-        return
-
-    # Confirm (send) single post
-    if data.startswith("confirm_post_"):
-        await query.answer()
-
-        parts = data.split("_")
-        if len(parts) < 5:
-            await query.answer("Invalid callback.", show_alert=True)
-            return
-
-        platform = parts[2]
-        account = "_".join(parts[3:-1])
-        idx = int(parts[-1])
-
-        user_data_key = f"pending_posts_{platform}_{account}"
-        pending = context.user_data.get(user_data_key)
-        if not pending or pending.get("index", 0) != idx:
-            logger.info(f"Stale click detected: expected index {pending.get('index', 'None')}, got {idx} for @{account}")
-            await query.answer("Post expired or out of order.", show_alert=True)
-            await send_next_post_with_confirmation(update, context, platform, account)
-            return
-
-        pending["has_sent_single"] = True
-        context.user_data[user_data_key] = pending
-        logger.info("Flag set: has_sent_single=True for %s/%s", platform, account)
-
-        post = pending["posts"][idx]
-        media_bytes = await download_media(post.get("media_url"))
-        if not media_bytes:
+        except BadRequest:
             try:
-                await context.bot.edit_message_caption(
+                await context.bot.edit_message_text(
                     chat_id=query.message.chat.id,
                     message_id=query.message.message_id,
-                    caption=(query.message.caption or "") + "\n\n❌ Media failed to load",
+                    text=(query.message.text or "") + "\n\n❌ Media failed to load",
                     reply_markup=None
                 )
-            except Exception:
-                try:
-                    await context.bot.edit_message_text(
-                        chat_id=query.message.chat.id,
-                        message_id=query.message.message_id,
-                        text=(query.message.text or "") + "\n\n❌ Media failed to load",
-                        reply_markup=None
-                    )
-                except Exception as e:
-                    logging.warning("Failed to mark preview as failed: %s", e)
-
-            pending["index"] += 1
-            context.user_data[user_data_key] = pending
-            await send_next_post_with_confirmation(query, context, platform, account)
-            return
-
-        view_text = {"x": "View on X🐦", "fb": "View on Facebook 🌐", "ig": "View on Instagram 📸"}.get(platform, "View Post 🔗")
-        link_html = f"<a href='{post.get('post_url','')}'>{view_text}</a>" if post.get('post_url') else ""
-        caption = (post.get("caption", "") or "")[:1024]
-        full_caption = f"{link_html}\n\n{caption}" if link_html else caption
-
-        bio = io.BytesIO(media_bytes)
-        if post.get("is_video"):
-            bio.name = "video.mp4"
-            sent = await query.message.reply_video(video=bio, caption=full_caption, parse_mode="HTML")
-        else:
-            bio.name = "photo.jpg"
-            sent = await query.message.reply_photo(photo=bio, caption=full_caption, parse_mode="HTML")
-
-        await schedule_delete(context, sent.chat.id, sent.message_id)
-
-        await safe_edit(query, text=full_caption + "\n\n✅ <b>Sent!</b>", parse_mode="HTML", reply_markup=None)
+            except Exception as e:
+                logging.warning("Failed to mark preview as failed: %s", e)
 
         pending["index"] += 1
         context.user_data[user_data_key] = pending
-
         await send_next_post_with_confirmation(query, context, platform, account)
         return
 
-    # Send all remaining
-    if data.startswith("send_all_"):
-        query = update.callback_query
-        await query.answer()
-
-        parts = data.split("_")
-        if len(parts) < 4:
-            await query.answer("Invalid callback.", show_alert=True)
-            return
-        platform = parts[2]
-        account = "_".join(parts[3:])
-
-        user_data_key = f"pending_posts_{platform}_{account}"
-        pending = context.user_data.get(user_data_key)
-        if not pending:
-            await query.answer("No pending posts.", show_alert=True)
-            return
+    full_caption = build_post_caption(platform, post)
+    sent = await send_post_media(query.message, post, media_bytes, full_caption)
 
-        if pending.get("has_sent_single"):
-            await query.answer("Bulk send disabled after single send.", show_alert=True)
-            await send_next_post_with_confirmation(update, context, platform, account)
-            return
+    await schedule_delete(context, sent.chat.id, sent.message_id)
 
-        pending["has_sent_single"] = True
-        context.user_data[user_data_key] = pending
-        logging.info("send_all: has_sent_single set for %s/%s", platform, account)
+    await safe_edit(query, text=full_caption + "\n\n✅ <b>Sent!</b>", parse_mode="HTML", reply_markup=None)
 
-        posts = pending.get("posts", []) or []
-        current_idx = int(pending.get("index", 0))
-        total_posts = int(pending.get("total", len(posts)))
+    pending["index"] += 1
+    context.user_data[user_data_key] = pending
 
-        try:
-            preview_text = (query.message.caption or query.message.text or "") + "\n\n🚀 Sending all remaining..."
-            try:
-                await asyncio.wait_for(
-                    context.bot.edit_message_caption(
-                        chat_id=query.message.chat.id,
-                        message_id=query.message.message_id,
-                        caption=preview_text,
-                        reply_markup=None
-                    ),
-                    timeout=6.0
-                )
-            except (asyncio.TimeoutError, Exception):
-                await asyncio.wait_for(
-                    context.bot.edit_message_text(
-                        chat_id=query.message.chat.id,
-                        message_id=query.message.message_id,
-                        text=preview_text,
-                        reply_markup=None
-                    ),
-                    timeout=6.0
-                )
-        except Exception as e:
-            logging.warning("send_all: could not mark preview as sending: %s", e)
+    await send_next_post_with_confirmation(query, context, platform, account)
 
-        total_sent = 0
+# Send all remaining
+@callback_route(r"^send_all_([^_]+)_(.*)$", counts_request=True)
+async def _cb_send_all(update, context, query, uid, platform, account):
+    user_data_key = f"pending_posts_{platform}_{account}"
+    pending = context.user_data.get(user_data_key)
+    if not pending:
+        await query.answer("No pending posts.", show_alert=True)
+        return
 
-        for idx in range(current_idx, min(total_posts, len(posts))):
-            post = posts[idx]
-            try:
-                media_bytes = await download_media(post.get("media_url"))
-            except Exception as e:
-                logging.warning("send_all: download_media exception for idx %s: %s", idx, e)
-                media_bytes = None
-
-            if not media_bytes:
-                logging.info("send_all: skipping idx %s (media failed)", idx)
-                pending["index"] = idx + 1
-                context.user_data[user_data_key] = pending
-                continue
-
-            view_text = {
-                "x": "View on X🐦",
-                "fb": "View on Facebook 🌐",
-                "ig": "View on Instagram 📸"
-            }.get(platform, "View Post 🔗")
-            link_html = f"<a href='{post.get('post_url','')}'>{view_text}</a>" if post.get('post_url') else ""
-            caption = (post.get("caption") or "")[:1024]
-            full_caption = f"{link_html}\n\n{caption}" if link_html else caption
-
-            bio = io.BytesIO(media_bytes)
-            try:
-                if post.get("is_video"):
-                    bio.name = "video.mp4"
-                    sent = await context.bot.send_video(
-                        chat_id=query.message.chat.id,
-                        video=bio,
-                        caption=full_caption,
-                        parse_mode="HTML"
-                    )
-                else:
-                    bio.name = "photo.jpg"
-                    sent = await context.bot.send_photo(
-                        chat_id=query.message.chat.id,
-                        photo=bio,
-                        caption=full_caption,
-                        parse_mode="HTML"
-                    )
-
-                try:
-                    await schedule_delete(context, sent.chat.id, sent.message_id)
-                except TypeError:
-                    try:
-                        schedule_delete(context, sent.chat.id, sent.message_id)
-                    except Exception:
-                        logging.debug("schedule_delete failed for sent message.")
-                except Exception:
-                    logging.debug("schedule_delete failed for sent message.")
-
-                total_sent += 1
-                logging.info("send_all: sent idx %s for %s/%s", idx, platform, account)
+    if pending.get("has_sent_single"):
+        await query.answer("Bulk send disabled after single send.", show_alert=True)
+        await send_next_post_with_confirmation(update, context, platform, account)
+        return
 
-            except Exception as e:
-                logging.exception("send_all: failed to send idx %s: %s", idx, e)
+    pending["has_sent_single"] = True
+    context.user_data[user_data_key] = pending
+    logging.info("send_all: has_sent_single set for %s/%s", platform, account)
 
-            pending["index"] = idx + 1
-            context.user_data[user_data_key] = pending
+    posts = pending.get("posts", []) or []
+    current_idx = int(pending.get("index", 0))
+    total_posts = int(pending.get("total", len(posts)))
 
-            await asyncio.sleep(5)
+    try:
+        preview_text = (query.message.caption or query.message.text or "") + "\n\n🚀 Sending all remaining..."
+        try:
+            await asyncio.wait_for(
+                context.bot.edit_message_caption(
+                    chat_id=query.message.chat.id,
+                    message_id=query.message.message_id,
+                    caption=preview_text,
+                    reply_markup=None
+                ),
+                timeout=6.0
+            )
+        except (asyncio.TimeoutError, Exception):
+            await asyncio.wait_for(
+                context.bot.edit_message_text(
+                    chat_id=query.message.chat.id,
+                    message_id=query.message.message_id,
+                    text=preview_text,
+                    reply_markup=None
+                ),
+                timeout=6.0
+            )
+    except Exception as e:
+        logging.warning("send_all: could not mark preview as sending: %s", e)
 
-        pending["index"] = pending.get("total", pending.get("index", 0))
-        context.user_data[user_data_key] = pending
+    indices = list(range(current_idx, min(total_posts, len(posts))))
+    # Posts with no media (X links) go out as batched text, not downloads
+    link_only = [idx for idx in indices if not posts[idx].get("media_url") and posts[idx].get("post_url")]
+    link_set = set(link_only)
+    media_indices = [idx for idx in indices if idx not in link_set]
 
+    async def _download(idx):
         try:
-            done_text = (query.message.caption or query.message.text or "") + f"\n\n✅ Sent all remaining ({total_sent} posts)!"
-            try:
-                await asyncio.wait_for(
-                    context.bot.edit_message_caption(
-                        chat_id=query.message.chat.id,
-                        message_id=query.message.message_id,
-                        caption=done_text,
-                        reply_markup=None
-                    ),
-                    timeout=6.0
-                )
-            except (asyncio.TimeoutError, Exception):
-                await asyncio.wait_for(
-                    context.bot.edit_message_text(
-                        chat_id=query.message.chat.id,
-                        message_id=query.message.message_id,
-                        text=done_text,
-                        reply_markup=None
-                    ),
-                    timeout=6.0
-                )
+            return await download_media(posts[idx].get("media_url"))
         except Exception as e:
-            logging.warning("send_all: could not mark preview done: %s", e)
+            logging.warning("send_all: download_media exception for idx %s: %s", idx, e)
+            return None
 
-        if total_sent > 0:
-            badge = get_user_badge(uid)
-            await send_ai_button(query.message, total_sent, platform, account, badge)
+    downloads = await asyncio.gather(*(bounded(_download(idx)) for idx in media_indices))
 
-        context.user_data.pop(user_data_key, None)
-        return
-
-    if data.startswith("skip_post_"):
-        _, _, plat_acc_idx = data.partition("skip_post_")
-        platform, _, acc_idx = plat_acc_idx.partition("_")
-        account, _, idx_s = acc_idx.partition("_")
+    ready = []
+    for idx, media_bytes in zip(media_indices, downloads):
+        if not media_bytes:
+            logging.info("send_all: skipping idx %s (media failed)", idx)
+            continue
+        ready.append((idx, posts[idx], media_bytes))
+
+    # Deliver as albums of up to 10 — one API call per album instead of per post
+    delete_targets = []
+    for start in range(0, len(ready), MEDIA_GROUP_MAX):
+        sent_msgs = await send_post_album(query.message, platform, ready[start:start + MEDIA_GROUP_MAX])
+        delete_targets.extend((m.chat.id, m.message_id) for m in sent_msgs)
+    total_sent = len(delete_targets)
+
+    for start in range(0, len(link_only), MEDIA_GROUP_MAX):
+        chunk = link_only[start:start + MEDIA_GROUP_MAX]
         try:
-            idx = int(idx_s)
-        except:
-            await query.answer("Invalid index.", show_alert=True)
-            return
+            text = "\n".join(posts[idx]["post_url"] for idx in chunk)
+            sent = await query.message.reply_text(text)
+            delete_targets.append((sent.chat.id, sent.message_id))
+            total_sent += len(chunk)
+        except Exception as e:
+            logging.error("send_all: failed to send links %s: %s", chunk, e)
+    logging.info("send_all: sent %s/%s posts for %s/%s", total_sent, len(indices), platform, account)
 
-        user_data_key = f"pending_posts_{platform}_{account}"
-        pending = context.user_data.get(user_data_key)
-        if not pending or pending.get("index", 0) != idx:
-            await query.answer("Post expired or out of order.", show_alert=True)
-            await send_next_post_with_confirmation(query, context, platform, account)
-            return
+    try:
+        await schedule_delete_many(context, delete_targets)
+    except Exception:
+        logging.debug("schedule_delete_many failed for sent messages.")
+
+    pending["index"] = pending.get("total", pending.get("index", 0))
+    context.user_data[user_data_key] = pending
 
+    try:
+        done_text = (query.message.caption or query.message.text or "") + f"\n\n✅ Sent all remaining ({total_sent} posts)!"
         try:
-            await context.bot.edit_message_caption(
-                chat_id=query.message.chat.id,
-                message_id=query.message.message_id,
-                caption=(query.message.caption or "") + "\n\n⏭️ <b>Skipped!</b>",
-                parse_mode="HTML",
-                reply_markup=None
+            await asyncio.wait_for(
+                context.bot.edit_message_caption(
+                    chat_id=query.message.chat.id,
+                    message_id=query.message.message_id,
+                    caption=done_text,
+                    reply_markup=None
+                ),
+                timeout=6.0
             )
-        except Exception:
-            await context.bot.edit_message_text(
-                chat_id=query.message.chat.id,
-                message_id=query.message.message_id,
-                text=(query.message.text or "") + "\n\n⏭️ <b>Skipped!</b>",
-                parse_mode="HTML",
-                reply_markup=None
+        except (asyncio.TimeoutError, Exception):
+            await asyncio.wait_for(
+                context.bot.edit_message_text(
+                    chat_id=query.message.chat.id,
+                    message_id=query.message.message_id,
+                    text=done_text,
+                    reply_markup=None
+                ),
+                timeout=6.0
             )
+    except Exception as e:
+        logging.warning("send_all: could not mark preview done: %s", e)
 
-        pending["index"] += 1
-        context.user_data[user_data_key] = pending
-
-        await send_next_post_with_confirmation(query, context, platform, account)
-        return
-
-    # Cancel remaining posts
-    if data.startswith("cancel_posts_"):
-        _, _, plat_acc = data.partition("cancel_posts_")
-        platform, _, account = plat_acc.partition("_")
-
-        user_data_key = f"pending_posts_{platform}_{account}"
-        pending = context.user_data.pop(user_data_key, None)
-
-        sent_count = pending["index"] if pending else 0
-        total = pending["total"] if pending else 0
-
-        await safe_edit(query, text=(query.message.caption or "") + f"\n\n❌ Cancelled. Sent {sent_count}/{total} posts.", parse_mode="HTML", reply_markup=None)
-        await query.message.reply_text(f"❌ Sending cancelled. Sent {sent_count}/{total} posts.")
-
-        if pending and pending["index"] > 0:
-            badge = get_user_badge(uid)
-            await send_ai_button(query.message, pending["index"], platform, account, badge)
-        return
-
-    # Admin confirmations
-    if data.startswith("confirm_ban_"):
-        if not is_admin(uid):
-            await query.edit_message_text("❌ Admins only.")
-            return
-        _, _, tid_s = data.partition("confirm_ban_")
-        try:
-            tid = int(tid_s)
-        except:
-            await query.edit_message_text("Invalid id.")
-            return
-        ban_tg_user(tid)
-        await query.edit_message_text(f"User {tid} has been banned.", reply_markup=build_admin_menu())
-        return
+    if total_sent > 0:
+        badge = await asyncio.to_thread(get_user_badge, uid)
+        await send_ai_button(query.message, total_sent, platform, account, badge)
 
-    if data.startswith("confirm_reset_cooldown_"):
-        if not is_admin(uid):
-            await query.edit_message_text("❌ Admins only.")
-            return
-        _, _, tid_s = data.partition("confirm_reset_cooldown_")
-        try:
-            tid = int(tid_s)
-        except:
-            await query.edit_message_text("Invalid id.")
-            return
-        reset_cooldown(tid)
-        await query.edit_message_text(f"Cooldown reset for user {tid}.", reply_markup=build_admin_menu())
-        return
+    context.user_data.pop(user_data_key, None)
 
-    if data.startswith("confirm_unban_"):
-        if not is_admin(uid):
-            await query.edit_message_text("❌ Admins only.")
-            return
-        _, _, tid_s = data.partition("confirm_unban_")
-        try:
-            tid = int(tid_s)
-        except:
-            await query.edit_message_text("Invalid id.")
-            return
-        unban_tg_user(tid)
-        await query.edit_message_text(f"User {tid} unbanned.", reply_markup=build_admin_menu())
-        return
+@callback_route(r"^skip_post_([^_]+)_(.*)_(\d+)$")
+async def _cb_skip_post(update, context, query, uid, platform, account, idx):
+    idx = int(idx)
 
-    if data == "confirm_export_csv":
-        if not is_admin(uid):
-            await query.edit_message_text("❌ Admins only.")
-            return
-        await query.edit_message_text("Preparing CSV...")
-        users = list_all_tg_users(limit=10000)
-        csv_bytes = users_to_csv_bytes(users)
-        bio = io.BytesIO(csv_bytes)
-        bio.name = "tg_users.csv"
-        try:
-            await context.bot.send_document(chat_id=uid, document=InputFile(bio))
-            await query.edit_message_text("CSV sent.")
-        except Exception as e:
-            await query.edit_message_text(f"Failed to send CSV: {e}")
+    user_data_key = f"pending_posts_{platform}_{account}"
+    pending = context.user_data.get(user_data_key)
+    if not pending or pending.get("index", 0) != idx:
+        await query.answer("Post expired or out of order.", show_alert=True)
+        await send_next_post_with_confirmation(query, context, platform, account)
         return
 
-    # Menu navigation
-    if data == "menu_main":
-        await query.edit_message_text("Main menu:", reply_markup=build_main_menu())
-        return
-    if data == "dashboard":
-        await dashboard_command(update, context)
-        return
-    if data == "menu_x":
-        context.user_data["platform"] = "x"
-        context.user_data["awaiting_username"] = True
-        await query.edit_message_text("Send the X/Twitter <b>user ID</b> (the long numeric ID, not username).\n\n"
-        "How to get it:\n"
-        "Go to <a href='https://tweethunter.io/twitter-id-converter'>Twitter Username Converter</a>\n"
-        "Enter the @username there → it gives you the numeric ID.\n"
-        "Copy and send that number here.\n\n",
-        parse_mode="HTML",
-        disable_web_page_preview=True,
-        reply_markup=build_back_markup("menu_main"))
-        return
-    if data == "menu_fb":
-        context.user_data["platform"] = "fb"
-        context.user_data["awaiting_username"] = True
-        await query.edit_message_text(
-            "Send the Facebook page username or name (e.g. nike, coca-cola):\n\n"
-            "Note: Only public pages and send direct page link for accuracy(recommended)! only the posted pictures is fetched",
-            reply_markup=build_back_markup("menu_main")
+    try:
+        await context.bot.edit_message_caption(
+            chat_id=query.message.chat.id,
+            message_id=query.message.message_id,
+            caption=(query.message.caption or "") + "\n\n⏭️ <b>Skipped!</b>",
+            parse_mode="HTML",
+            reply_markup=None
+        )
+    except BadRequest:
+        await context.bot.edit_message_text(
+            chat_id=query.message.chat.id,
+            message_id=query.message.message_id,
+            text=(query.message.text or "") + "\n\n⏭️ <b>Skipped!</b>",
+            parse_mode="HTML",
+            reply_markup=None
         )
-        return
-    if data == "menu_ig":
-        context.user_data["platform"] = "ig"
-        context.user_data["awaiting_username"] = True
-        await query.edit_message_text("Send the Instagram username (without @):", reply_markup=build_back_markup("menu_main"))
-        return
-    if data =="help":
-        await help_command(update, context)
-        return
-
-    if data == "menu_yt":
-        context.user_data["platform"] = "yt"
-        context.user_data["awaiting_username"] = True
-        await query.edit_message_text("Send YouTube channel username (e.g. Seyivibe) or search query:", reply_markup=build_back_markup("menu_main"))
-        return
-
-    if data == "saved_menu":
-        await query.edit_message_text("Saved usernames:", reply_markup=build_saved_menu())
-        return
-    if data == "saved_add_start":
-        context.user_data["awaiting_save"] = True
-        await query.edit_message_text("Send: <platform> <username or ID> [label]\nExample: `x elonmusk fav`", reply_markup=build_back_markup("saved_menu"))
-        return
-    if data == "saved_list" or data.startswith("saved_page_"):
-        page = 0
-        if data.startswith("saved_page_"):
-            page = int(data[len("saved_page_"):])
-
-        items = list_saved_accounts(uid)
-        if not items:
-            await query.edit_message_text("You no get any saved account. Save page link when saving in fb", reply_markup=build_saved_menu())
-            return
 
-        per_page = 4
-        start = page * per_page
-        end = start + per_page
-        page_items = items[start:end]
-        total_pages = (len(items) + per_page - 1) // per_page
-
-        text = f"Your saved accounts ({page+1}/{total_pages}):\n\n"
-        rows = []
-        for it in page_items:
-            sid = it["id"]
-            plat = it["platform"].upper()
-            acc = it["account_name"]
-            lbl = it.get("label") or ""
-            display = f"{sid}. [{plat}] @{acc}"
-            if lbl:
-                display += f" — {lbl}"
-            text += display + "\n"
-
-            rows.append([
-                InlineKeyboardButton("Send", callback_data=f"saved_sendcb_{sid}"),
-                InlineKeyboardButton("Rename", callback_data=f"saved_rename_start_{sid}"),
-                InlineKeyboardButton("Remove", callback_data=f"saved_removecb_{sid}")
-            ])
-
-        nav = []
-        if page > 0:
-            nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"saved_page_{page-1}"))
-        if end < len(items):
-            nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"saved_page_{page+1}"))
-        if nav:
-            rows.append(nav)
-
-        rows.append([InlineKeyboardButton("↩️ Back", callback_data="saved_menu")])
-
-        await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(rows))
+    pending["index"] += 1
+    context.user_data[user_data_key] = pending
+
+    await send_next_post_with_confirmation(query, context, platform, account)
+
+# Cancel remaining posts
+@callback_route(r"^cancel_posts_([^_]+)_(.*)$")
+async def _cb_cancel_posts(update, context, query, uid, platform, account):
+    user_data_key = f"pending_posts_{platform}_{account}"
+    pending = context.user_data.pop(user_data_key, None)
+
+    sent_count = pending["index"] if pending else 0
+    total = pending["total"] if pending else 0
+
+    await safe_edit(query, text=(query.message.caption or "") + f"\n\n❌ Cancelled. Sent {sent_count}/{total} posts.", parse_mode="HTML", reply_markup=None)
+    await query.message.reply_text(f"❌ Sending cancelled. Sent {sent_count}/{total} posts.")
+
+    if pending and pending["index"] > 0:
+        badge = await asyncio.to_thread(get_user_badge, uid)
+        await send_ai_button(query.message, pending["index"], platform, account, badge)
+
+# Admin users-list pages: offset -> (expires_at, rows). Prev/Next clicks within
+# USERS_PAGE_CACHE_TTL reuse the page; ban/unban drop everything so flags stay fresh
+USERS_PAGE_CACHE_TTL = 30
+_users_page_cache: Dict[int, Tuple[float, List[Dict[str, Any]]]] = {}
+
+async def _get_users_page_cached(start: int) -> List[Dict[str, Any]]:
+    hit = _users_page_cache.get(start)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    rows = await asyncio.to_thread(list_tg_users_page, start, PAGE_SIZE_USERS)
+    _users_page_cache[start] = (time.monotonic() + USERS_PAGE_CACHE_TTL, rows)
+    return rows
+
+# Admin confirmations
+@callback_route(r"^confirm_ban_(\d+)$", admin=True)
+async def _cb_confirm_ban(update, context, query, uid, tid):
+    tid = int(tid)
+    await asyncio.to_thread(ban_tg_user, tid)
+    set_ban_cache(tid, True)
+    _users_page_cache.clear()
+    await query.edit_message_text(f"User {tid} has been banned.", reply_markup=ADMIN_MENU)
+
+@callback_route(r"^confirm_reset_cooldown_(\d+)$", admin=True)
+async def _cb_confirm_reset_cooldown(update, context, query, uid, tid):
+    tid = int(tid)
+    await asyncio.to_thread(reset_cooldown, tid)
+    await query.edit_message_text(f"Cooldown reset for user {tid}.", reply_markup=ADMIN_MENU)
+
+@callback_route(r"^confirm_unban_(\d+)$", admin=True)
+async def _cb_confirm_unban(update, context, query, uid, tid):
+    tid = int(tid)
+    await asyncio.to_thread(unban_tg_user, tid)
+    set_ban_cache(tid, False)
+    _users_page_cache.clear()
+    await query.edit_message_text(f"User {tid} unbanned.", reply_markup=ADMIN_MENU)
+
+@callback_route(r"^confirm_export_csv$", admin=True, counts_request=True)
+async def _cb_confirm_export_csv(update, context, query, uid):
+    await query.edit_message_text("Preparing CSV...")
+    try:
+        csv_file = await asyncio.to_thread(write_users_csv, iter_all_tg_users())
+    except Exception as e:
+        # Never upload a partial file as if it were the full export
+        await query.edit_message_text(f"Export failed: {e}")
         return
-    if data.startswith("saved_removecb_"):
-        _, _, sid_s = data.partition("saved_removecb_")
-        try:
-            sid = int(sid_s)
-        except:
-            await query.edit_message_text("Invalid id.")
-            return
-        ok = remove_saved_account(uid, sid)
-        if ok:
-            await query.edit_message_text(f"Removed saved account {sid}.", reply_markup=build_saved_menu())
-        else:
-            await query.edit_message_text("Could not remove saved account.", reply_markup=build_saved_menu())
-        return
-
-    if data.startswith("saved_rename_start_"):
-        _, _, sid_s = data.partition("saved_rename_start_")
-        try:
-            sid = int(sid_s)
-        except:
-            await query.edit_message_text("Invalid id.")
-            return
-        context.user_data["awaiting_rename_id"] = sid
-        await query.edit_message_text("Send the new label for this saved account (single message):", reply_markup=build_back_markup("saved_list"))
+    try:
+        await context.bot.send_document(chat_id=uid, document=InputFile(csv_file, filename="tg_users.csv"))
+        await query.edit_message_text("CSV sent.")
+    except Exception as e:
+        await query.edit_message_text(f"Failed to send CSV: {e}")
+    finally:
+        csv_file.close()
+
+# Menu navigation
+@callback_route(r"^menu_main$")
+async def _cb_menu_main(update, context, query, uid):
+    await query.edit_message_text("Main menu:", reply_markup=MAIN_MENU)
+
+@callback_route(r"^dashboard$")
+async def _cb_dashboard(update, context, query, uid):
+    await dashboard_command(update, context)
+
+@callback_route(r"^menu_x$", counts_request=True)
+async def _cb_menu_x(update, context, query, uid):
+    context.user_data["platform"] = "x"
+    context.user_data["awaiting_username"] = True
+    await query.edit_message_text("Send the X/Twitter <b>user ID</b> (the long numeric ID, not username).\n\n"
+    "How to get it:\n"
+    "Go to <a href='https://tweethunter.io/twitter-id-converter'>Twitter Username Converter</a>\n"
+    "Enter the @username there → it gives you the numeric ID.\n"
+    "Copy and send that number here.\n\n",
+    parse_mode="HTML",
+    disable_web_page_preview=True,
+    reply_markup=BACK_MAIN)
+
+@callback_route(r"^menu_fb$", counts_request=True)
+async def _cb_menu_fb(update, context, query, uid):
+    context.user_data["platform"] = "fb"
+    context.user_data["awaiting_username"] = True
+    await query.edit_message_text(
+        "Send the Facebook page username or name (e.g. nike, coca-cola):\n\n"
+        "Note: Only public pages and send direct page link for accuracy(recommended)! only the posted pictures is fetched",
+        reply_markup=BACK_MAIN
+    )
+
+@callback_route(r"^menu_ig$", counts_request=True)
+async def _cb_menu_ig(update, context, query, uid):
+    context.user_data["platform"] = "ig"
+    context.user_data["awaiting_username"] = True
+    await query.edit_message_text("Send the Instagram username (without @):", reply_markup=BACK_MAIN)
+
+@callback_route(r"^help$")
+async def _cb_help(update, context, query, uid):
+    await help_command(update, context)
+
+@callback_route(r"^menu_yt$", counts_request=True)
+async def _cb_menu_yt(update, context, query, uid):
+    context.user_data["platform"] = "yt"
+    context.user_data["awaiting_username"] = True
+    await query.edit_message_text("Send YouTube channel username (e.g. Seyivibe) or search query:", reply_markup=BACK_MAIN)
+
+@callback_route(r"^saved_menu$")
+async def _cb_saved_menu(update, context, query, uid):
+    await query.edit_message_text("Saved usernames:", reply_markup=SAVED_MENU)
+
+@callback_route(r"^saved_add_start$")
+async def _cb_saved_add_start(update, context, query, uid):
+    context.user_data["awaiting_save"] = True
+    await query.edit_message_text("Send: <platform> <username or ID> [label]\nExample: `x elonmusk fav`", reply_markup=build_back_markup("saved_menu"))
+
+@callback_route(r"^saved_list$")
+@callback_route(r"^saved_page_(\d+)$")
+async def _cb_saved_list(update, context, query, uid, page="0"):
+    page = int(page)
+
+    items = await asyncio.to_thread(list_saved_accounts, uid)
+    if not items:
+        await query.edit_message_text("You no get any saved account. Save page link when saving in fb", reply_markup=SAVED_MENU)
         return
 
-    # Admin panel callbacks
-    if data.startswith("admin_"):
-        if not is_admin(uid):
-            await query.edit_message_text("❌ Admins only.")
-            return
-
-        if data.startswith("admin_list_users_"):
-            _, _, page_s = data.partition("admin_list_users_")
-            page = int(page_s or "0")
-            users = list_all_tg_users(limit=10000)
-            total = len(users)
-            start = page * PAGE_SIZE_USERS
-            end = start + PAGE_SIZE_USERS
-            page_users = users[start:end]
-            text = f"Users (page {page+1}):\n\n"
-            rows = []
-            for u in page_users:
-                tid = u.get('telegram_id')
-                text += f"- {u.get('first_name') or ''} ({tid}) banned={u.get('is_banned')} reqs={u.get('request_count')} invites={u.get('invite_count')}\n"
-                rows.append([
-                    InlineKeyboardButton(f"Stats {tid}", callback_data=f"admin_user_stats_{tid}"),
-                    InlineKeyboardButton(f"Reset CD {tid}", callback_data=f"admin_reset_cooldown_start_{tid}"),
-                    InlineKeyboardButton(f"Ban {tid}" if not u.get('is_banned') else f"Unban {tid}", callback_data=f"admin_{'ban' if not u.get('is_banned') else 'unban'}_start_{tid}")
-                ])
-            nav_row = []
-            if page > 0:
-                nav_row.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"admin_list_users_{page-1}"))
-            if end < total:
-                nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"admin_list_users_{page+1}"))
-            if nav_row:
-                rows.append(nav_row)
-            rows.append([InlineKeyboardButton("↩️ Back", callback_data="admin_back")])
-            await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(rows))
-            return
-
-        if data.startswith("admin_user_stats_"):
-            _, _, tid_s = data.partition("admin_user_stats_")
-            try:
-                tid = int(tid_s)
-            except:
-                await query.edit_message_text("Invalid id.")
-                return
-            stats = get_user_stats(tid)
-            if not stats:
-                await query.edit_message_text("User not found.")
-                return
-            user = stats['user']
-            badge = stats['badge']
-            rl = stats['rate_limits']
-            saves = stats['save_count']
-            text = f"Stats for {user.get('first_name', 'User')} ({tid})\n\n"
-            text += f"Joined: {user.get('joined_at')}\nRequests: {user.get('request_count', 0)}\nInvites: {user.get('invite_count', 0)}\nBanned: {bool(user.get('is_banned'))}\n"
-            text += f"Badge: {badge['emoji']} {badge['name']}\nSaves: {saves}/{badge['save_slots'] if isinstance(badge['save_slots'], int) else '∞'}\n\n"
-            text += "Cooldowns:\n"
-            text += f"Minute: {rl.get('minute_count',0)}/{badge['limits'].get('min','∞')} (reset: {rl.get('minute_reset')})\n"
-            text += f"Hour: {rl.get('hour_count',0)}/{badge['limits'].get('hour','∞')} (reset: {rl.get('hour_reset')})\n"
-            text += f"Day: {rl.get('day_count',0)}/{badge['limits'].get('day','∞')} (reset: {rl.get('day_reset')})\n"
-            await query.edit_message_text(text, reply_markup=build_back_markup("admin_list_users_0"))
-            return
-
-        if data.startswith("admin_reset_cooldown_start_"):
-            _, _, tid_s = data.partition("admin_reset_cooldown_start_")
-            try:
-                tid = int(tid_s)
-            except:
-                await query.edit_message_text("Invalid id.")
-                return
-            await query.edit_message_text(f"Confirm reset cooldown for {tid}?", reply_markup=build_confirm_markup("reset_cooldown", tid))
-            return
-
-        if data == "admin_leaderboard":
-            await query.edit_message_text("Loading leaderboard...", reply_markup=build_back_markup("admin_back"))
-            return
-
-        if data == "admin_back":
-            await query.edit_message_text("Admin panel:", reply_markup=build_admin_menu())
-            return
-
-        if data == "admin_export_csv":
-            await query.edit_message_text("Export users to CSV? Confirm to proceed.", reply_markup=build_confirm_markup("export_csv"))
-            return
-
-        if data == "admin_broadcast_start":
-            context.user_data["admin_broadcast"] = True
-            await query.edit_message_text("Send the message to broadcast. Use /cancel to abort.", reply_markup=build_cancel_and_back("admin_broadcast_cancel", "admin_back"))
-            return
-
-        if data == "admin_broadcast_cancel":
-            context.user_data.pop("admin_broadcast", None)
-            await query.edit_message_text("Broadcast cancelled.", reply_markup=build_admin_menu())
-            return
-
-        if data == "admin_ai_start":
-            context.user_data["awaiting_manual_ai"] = True
-            await query.edit_message_text(
-                "🧠 <b>Manual AI Analysis</b>\n\n"
-                "Send the text/post/caption you want me to analyze with Groq AI.\n"
-                "If you just fetched posts, I can auto-use them if you send nothing.\n\n"
-                "/cancel to abort.",
-                parse_mode="HTML",
-                reply_markup=build_back_markup("admin_back")
-            )
-            return
-
-    if data.startswith("page_"):
-        parts = data.split("_", 3)
-        if len(parts) < 4:
-            await query.edit_message_text("Invalid page data.")
-            return
-        page = int(parts[1])
-        platform = parts[2]
-        account = parts[3]
-        posts = fetch_latest_urls(platform, account) if platform == "x" else await fetch_ig_urls(account)
-        start = page * POSTS_PER_PAGE
-        end = start + POSTS_PER_PAGE
-        page_posts = posts[start:end]
-        total_pages = max(1, (len(posts) + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE)
-        msg = f"Page {page+1} of {total_pages}\n\n"
-        for p in page_posts:
-            if isinstance(p, dict):
-                msg += f"{p.get('url')}\n"
-            else:
-                msg += f"{p}\n"
-        keyboard = []
-        if page > 0:
-            keyboard.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"page_{page-1}_{platform}_{account}"))
-        if page < total_pages - 1:
-            keyboard.append(InlineKeyboardButton("Next ➡️", callback_data=f"page_{page+1}_{platform}_{account}"))
-        await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup([keyboard]) if keyboard else None)
+    per_page = 4
+    start = page * per_page
+    end = start + per_page
+    page_items = items[start:end]
+    total_pages = (len(items) + per_page - 1) // per_page
+
+    lines = [f"Your saved accounts ({page+1}/{total_pages}):\n\n"]
+    rows = []
+    for it in page_items:
+        sid = it["id"]
+        plat = it["platform"].upper()
+        acc = it["account_name"]
+        lbl = it.get("label") or ""
+        lbl_suffix = f" — {lbl}" if lbl else ""
+        lines.append(f"{sid}. [{plat}] @{acc}{lbl_suffix}\n")
+
+        rows.append(build_saved_row(sid))
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"saved_page_{page-1}"))
+    if end < len(items):
+        nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"saved_page_{page+1}"))
+    if nav:
+        rows.append(nav)
+
+    rows.append([SAVED_BACK_BTN])
+
+    await query.edit_message_text("".join(lines), reply_markup=InlineKeyboardMarkup(rows))
+
+@callback_route(r"^saved_removecb_(\d+)$")
+async def _cb_saved_remove(update, context, query, uid, sid):
+    sid = int(sid)
+    ok = await asyncio.to_thread(remove_saved_account, uid, sid)
+    if ok:
+        await query.edit_message_text(f"Removed saved account {sid}.", reply_markup=SAVED_MENU)
+    else:
+        await query.edit_message_text("Could not remove saved account.", reply_markup=SAVED_MENU)
+
+@callback_route(r"^saved_rename_start_(\d+)$")
+async def _cb_saved_rename_start(update, context, query, uid, sid):
+    sid = int(sid)
+    context.user_data["awaiting_rename_id"] = sid
+    await query.edit_message_text("Send the new label for this saved account (single message):", reply_markup=build_back_markup("saved_list"))
+
+# Admin panel callbacks
+@callback_route(r"^admin_list_users_(\d+)$", admin=True)
+async def _cb_admin_list_users(update, context, query, uid, page):
+    page = int(page)
+    start = page * PAGE_SIZE_USERS
+    page_users, total = await asyncio.gather(
+        _get_users_page_cached(start),
+        asyncio.to_thread(count_tg_users)
+    )
+    lines = [f"Users (page {page+1}):\n\n"]
+    rows = []
+    for u in page_users:
+        tid = u.get('telegram_id')
+        lines.append(f"- {u.get('first_name') or ''} ({tid}) banned={u.get('is_banned')} reqs={u.get('request_count')} invites={u.get('invite_count')}\n")
+        rows.append([
+            InlineKeyboardButton(f"Stats {tid}", callback_data=f"admin_user_stats_{tid}"),
+            InlineKeyboardButton(f"Reset CD {tid}", callback_data=f"admin_reset_cooldown_start_{tid}"),
+            InlineKeyboardButton(f"Ban {tid}" if not u.get('is_banned') else f"Unban {tid}", callback_data=f"admin_{'ban' if not u.get('is_banned') else 'unban'}_start_{tid}")
+        ])
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"admin_list_users_{page-1}"))
+    if start + len(page_users) < total:
+        nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"admin_list_users_{page+1}"))
+    if nav_row:
+        rows.append(nav_row)
+    rows.append([InlineKeyboardButton("↩️ Back", callback_data="admin_back")])
+    await query.edit_message_text("".join(lines), reply_markup=InlineKeyboardMarkup(rows))
+
+@callback_route(r"^admin_user_stats_(\d+)$", admin=True)
+async def _cb_admin_user_stats(update, context, query, uid, tid):
+    tid = int(tid)
+    stats = await asyncio.to_thread(get_user_stats, tid)
+    if not stats:
+        await query.edit_message_text("User not found.")
         return
+    user = stats['user']
+    badge = stats['badge']
+    rl = stats['rate_limits']
+    saves = stats['save_count']
+    text = "".join((
+        f"Stats for {user.get('first_name', 'User')} ({tid})\n\n",
+        f"Joined: {user.get('joined_at')}\nRequests: {user.get('request_count', 0)}\nInvites: {user.get('invite_count', 0)}\nBanned: {bool(user.get('is_banned'))}\n",
+        f"Badge: {badge['emoji']} {badge['name']}\nSaves: {saves}/{badge['save_slots'] if isinstance(badge['save_slots'], int) else '∞'}\n\n",
+        "Cooldowns:\n",
+        f"Minute: {rl.get('minute_count',0)}/{badge['limits'].get('min','∞')} (reset: {rl.get('minute_reset')})\n",
+        f"Hour: {rl.get('hour_count',0)}/{badge['limits'].get('hour','∞')} (reset: {rl.get('hour_reset')})\n",
+        f"Day: {rl.get('day_count',0)}/{badge['limits'].get('day','∞')} (reset: {rl.get('day_reset')})\n",
+    ))
+    await query.edit_message_text(text, reply_markup=build_back_markup("admin_list_users_0"))
+
+@callback_route(r"^admin_reset_cooldown_start_(\d+)$", admin=True)
+async def _cb_admin_reset_cooldown_start(update, context, query, uid, tid):
+    tid = int(tid)
+    await query.edit_message_text(f"Confirm reset cooldown for {tid}?", reply_markup=build_confirm_markup("reset_cooldown", tid))
+
+@callback_route(r"^admin_leaderboard$", admin=True)
+async def _cb_admin_leaderboard(update, context, query, uid):
+    await query.edit_message_text("Loading leaderboard...", reply_markup=build_back_markup("admin_back"))
+
+@callback_route(r"^admin_back$", admin=True)
+async def _cb_admin_back(update, context, query, uid):
+    await query.edit_message_text("Admin panel:", reply_markup=ADMIN_MENU)
+
+@callback_route(r"^admin_export_csv$", admin=True)
+async def _cb_admin_export_csv(update, context, query, uid):
+    await query.edit_message_text("Export users to CSV? Confirm to proceed.", reply_markup=build_confirm_markup("export_csv"))
+
+@callback_route(r"^admin_broadcast_start$", admin=True)
+async def _cb_admin_broadcast_start(update, context, query, uid):
+    context.user_data["admin_broadcast"] = True
+    await query.edit_message_text("Send the message to broadcast. Use /cancel to abort.", reply_markup=build_cancel_and_back("admin_broadcast_cancel", "admin_back"))
+
+@callback_route(r"^admin_broadcast_cancel$", admin=True)
+async def _cb_admin_broadcast_cancel(update, context, query, uid):
+    context.user_data.pop("admin_broadcast", None)
+    await query.edit_message_text("Broadcast cancelled.", reply_markup=ADMIN_MENU)
+
+@callback_route(r"^admin_ai_start$", admin=True)
+async def _cb_admin_ai_start(update, context, query, uid):
+    context.user_data["awaiting_manual_ai"] = True
+    await query.edit_message_text(
+        "🧠 <b>Manual AI Analysis</b>\n\n"
+        "Send the text/post/caption you want me to analyze with Groq AI.\n"
+        "If you just fetched posts, I can auto-use them if you send nothing.\n\n"
+        "/cancel to abort.",
+        parse_mode="HTML",
+        reply_markup=build_back_markup("admin_back")
+    )
+
+# Any other admin_* action: admins get the unknown-action reply
+@callback_route(r"^admin_", admin=True)
+async def _cb_admin_other(update, context, query, uid):
+    await query.edit_message_text("Unknown action or handled elsewhere.")
+
+@callback_route(r"^page_(\d+)_([^_]+)_(.+)$", counts_request=True)
+async def _cb_page(update, context, query, uid, page, platform, account):
+    page = int(page)
+    posts = await get_posts_cached(platform, account)
+    start = page * POSTS_PER_PAGE
+    end = start + POSTS_PER_PAGE
+    page_posts = posts[start:end]
+    total_pages = max(1, (len(posts) + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE)
+    lines = [f"Page {page+1} of {total_pages}\n\n"]
+    for p in page_posts:
+        lines.append(f"{p.get('url') if isinstance(p, dict) else p}\n")
+    msg = "".join(lines)
+    keyboard = []
+    if page > 0:
+        keyboard.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"page_{page-1}_{platform}_{account}"))
+    if page < total_pages - 1:
+        keyboard.append(InlineKeyboardButton("Next ➡️", callback_data=f"page_{page+1}_{platform}_{account}"))
+    await query.edit_message_text(msg, reply_markup=InlineKeyboardMarkup([keyboard]) if keyboard else None)
 
-    await query.edit_message_text("Unknown action or handled elsewhere.")
\ No newline at end of file
+async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Fallback for callback data that no CALLBACK_ROUTES pattern matched."""
+    query = update.callback_query
+    await query.answer()
+    await record_user_and_check_ban(update, context, count_request=False)
+    await query.edit_message_text("Unknown action or handled elsewhere.")
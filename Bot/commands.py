@@ -1,4 +1,6 @@
 import math
+import time
+import asyncio
 import logging
 from telegram import Update, BotCommand, BotCommandScopeDefault, BotCommandScopeChat
 from telegram.ext import ContextTypes
@@ -12,6 +14,37 @@ from typing import Dict, Optional, Any, Tuple, Callable, List
 
 logger = logging.getLogger(__name__)
 
+# Static dashboard segments
+_DASH_HEADER = "👤 Dashboard\n\n"
+_DASH_SPEED_HEADER = "\n⚡ Speed limits:\n"
+_DASH_OVER_LIMIT = " (over limit — remove some or invite to increase)"
+_DASH_UNLIMITED = "⚡ Unlimited Access"
+_DASH_FORCE_ON = "🧪 Force Mode: ON (show latest posts even if seen before)"
+_DASH_FORCE_OFF = "🧪 Force Mode: OFF"
+
+def _lim_str(val) -> str:
+    if isinstance(val, (int, float)) and not math.isinf(val):
+        return str(int(val))
+    return "∞"
+
+def _badge_display(badge: Dict[str, Any]) -> Dict[str, Any]:
+    limits = badge.get("limits", {})
+    return {
+        "slots": _lim_str(badge.get("save_slots")),
+        "min": _lim_str(limits.get("min")),
+        "hour": _lim_str(limits.get("hour")),
+        "day": _lim_str(limits.get("day")),
+    }
+
+# Badge name -> pre-formatted limit strings and the next invite-reachable badge
+# (None at the top); built once at import so the shared config dicts stay untouched
+_BADGE_DISPLAY: Dict[str, Dict[str, Any]] = {}
+for _i, _badge in enumerate(BADGE_LEVELS):
+    _next = BADGE_LEVELS[_i + 1] if _i + 1 < len(BADGE_LEVELS) else None
+    if _next is not None and _next.get("invites_needed") is None:
+        _next = None
+    _BADGE_DISPLAY[_badge["name"]] = {**_badge_display(_badge), "next": _next}
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     if not user:
@@ -20,7 +53,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     first_name = user.first_name or ""
 
     try:
-        is_new = create_user_if_missing(tid, first_name)
+        is_new = await asyncio.to_thread(create_user_if_missing, tid, first_name)
     except Exception:
         is_new = False
 
@@ -28,7 +61,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             inviter_id = int(context.args[0])
             if inviter_id != tid:
-                increment_invite_count(inviter_id)
+                # increment_invite_count also drops the inviter's cached badge
+                await asyncio.to_thread(increment_invite_count, inviter_id)
+                _leaderboard_cache["expires_at"] = 0.0
         except Exception:
             pass
 
@@ -42,14 +77,14 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Commands & quick actions available in the menu.\n"
         "Saved accounts: /save /saved_list /saved_send /saved_remove /saved_rename\n\n"
     )
-    await update.effective_message.reply_text(text, reply_markup=build_main_menu())
+    await update.effective_message.reply_text(text, reply_markup=MAIN_MENU)
 
 async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     allowed = await record_user_and_check_ban(update, context)
     if not allowed:
         await update.effective_message.reply_text("🚫 You are banned.")
         return
-    await update.effective_message.reply_text("Choose:", reply_markup=build_main_menu())
+    await update.effective_message.reply_text("Choose:", reply_markup=MAIN_MENU)
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     allowed = await record_user_and_check_ban(update, context)
@@ -90,24 +125,24 @@ async def benefits_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not allowed:
         await update.effective_message.reply_text("🚫 You are banned.")
         return
-    text = (
-    "🏆 <b>Badge Levels & Perks</b> 🏆\n\n"
-    "Invite friends → level up → get massive boosts!\n\n"
-    )
+    lines = [
+        "🏆 <b>Badge Levels & Perks</b> 🏆\n\n"
+        "Invite friends → level up → get massive boosts!\n\n"
+    ]
     for level in BADGE_LEVELS[:-1]:
         slots = "Unlimited ♾️" if isinstance(level['save_slots'], float) and math.isinf(level['save_slots']) else level['save_slots']
         min_lim = "Unlimited ♾️" if isinstance(level['limits']['min'], float) and math.isinf(level['limits']['min']) else level['limits']['min']
         hour_lim = "Unlimited ♾️" if isinstance(level['limits']['hour'], float) and math.isinf(level['limits']['hour']) else level['limits']['hour']
         day_lim = "Unlimited ♾️" if isinstance(level['limits']['day'], float) and math.isinf(level['limits']['day']) else level['limits']['day']
 
-        text += f"{level['emoji']} <b>{level['name']}</b> ({level.get('invites_needed', 0)} invites needed)\n"
-        text += f"• Save slots: {slots}\n"
-        text += f"• Speed: {min_lim}/min | {hour_lim}/hour | {day_lim}/day\n\n"
+        lines.append(f"{level['emoji']} <b>{level['name']}</b> ({level.get('invites_needed', 0)} invites needed)\n")
+        lines.append(f"• Save slots: {slots}\n")
+        lines.append(f"• Speed: {min_lim}/min | {hour_lim}/hour | {day_lim}/day\n\n")
 
-    text += "💎 <b>Diamond</b>: Truly unlimited – fetch as much as you want, save everything! 👑\n\n"
-    text += "<i>Share your invite link (in /dashboard) and climb the ranks today! 🚀</i>"
+    lines.append("💎 <b>Diamond</b>: Truly unlimited – fetch as much as you want, save everything! 👑\n\n")
+    lines.append("<i>Share your invite link (in /dashboard) and climb the ranks today! 🚀</i>")
 
-    await update.effective_message.reply_text(text, parse_mode="HTML")
+    await update.effective_message.reply_text("".join(lines), parse_mode="HTML")
 
 async def dashboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     allowed = await record_user_and_check_ban(update, context)
@@ -116,67 +151,52 @@ async def dashboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     tid = update.effective_user.id
-    badge = get_user_badge(tid)
-    user = get_tg_user(tid) or {}
+    # Independent reads: run them side by side in worker threads
+    badge, user, saves = await asyncio.gather(
+        asyncio.to_thread(get_user_badge, tid),
+        asyncio.to_thread(get_tg_user, tid),
+        asyncio.to_thread(count_saved_accounts, tid),
+    )
+    user = user or {}
     invites = int(user.get('invite_count', 0) or 0)
-    saves = count_saved_accounts(tid)
-
-    next_badge = None
-    invites_left = 0
-    for i, level in enumerate(BADGE_LEVELS):
-        if level.get("name") == badge.get("name"):
-            if i + 1 < len(BADGE_LEVELS):
-                cand = BADGE_LEVELS[i + 1]
-                if cand.get("invites_needed") is not None:
-                    next_badge = cand
-                    invites_left = max(0, cand["invites_needed"] - invites)
-            break
 
-    allowed_slots = badge.get("save_slots")
-    if isinstance(allowed_slots, (int, float)) and not math.isinf(allowed_slots):
-        allowed_str = str(int(allowed_slots))
-    else:
-        allowed_str = "∞"
-
-    def lim_str(val):
-        if isinstance(val, (int, float)) and not math.isinf(val):
-            return str(int(val))
-        return "∞"
+    disp = _BADGE_DISPLAY.get(badge.get("name")) or _badge_display(badge)
+    next_badge = disp.get("next")
+    invites_left = max(0, next_badge["invites_needed"] - invites) if next_badge else 0
 
+    allowed_slots = badge.get("save_slots")
     over_text = ""
     if isinstance(allowed_slots, (int, float)) and not math.isinf(allowed_slots) and saves > allowed_slots:
-        over_text = " (over limit — remove some or invite to increase)"
-
-    lines = []
-    lines.append("👤 Dashboard\n")
-    lines.append(f"🏅 Badge: {badge.get('emoji','')} {badge.get('name','')}")
-    lines.append(f"📨 Invites: {invites}")
-    lines.append(f"📦 Save Slots: {saves}/{allowed_str}{over_text}\n")
-    lines.append("⚡ Speed limits:")
-    lines.append(f"• {lim_str(badge.get('limits', {}).get('min'))}/min")
-    lines.append(f"• {lim_str(badge.get('limits', {}).get('hour'))}/hour")
-    lines.append(f"• {lim_str(badge.get('limits', {}).get('day'))}/day\n")
+        over_text = _DASH_OVER_LIMIT
 
     if next_badge:
-        lines.append(f"⏭ Next Badge: {next_badge.get('emoji','')} {next_badge.get('name','')} ({invites_left} invites left)")
-    else:
-        lines.append("⚡ Unlimited Access")
-
-    bot_username = context.bot.username or ""
-    lines.append(f"\nYour invite link: {get_invite_link(bot_username, tid)}")
-
-    if TEST_MODE.get("enabled"):
-        lines.append("🧪 Force Mode: ON (show latest posts even if seen before)")
+        next_line = f"⏭ Next Badge: {next_badge.get('emoji','')} {next_badge.get('name','')} ({invites_left} invites left)"
     else:
-        lines.append("🧪 Force Mode: OFF")
+        next_line = _DASH_UNLIMITED
+
+    bot_username = context.bot_data.get("bot_username") or context.bot.username or ""
+
+    text = "".join((
+        _DASH_HEADER,
+        f"🏅 Badge: {badge.get('emoji','')} {badge.get('name','')}\n",
+        f"📨 Invites: {invites}\n",
+        f"📦 Save Slots: {saves}/{disp['slots']}{over_text}\n",
+        _DASH_SPEED_HEADER,
+        f"• {disp['min']}/min\n",
+        f"• {disp['hour']}/hour\n",
+        f"• {disp['day']}/day\n\n",
+        next_line,
+        f"\n\nYour invite link: {get_invite_link(bot_username, tid)}\n",
+        _DASH_FORCE_ON if TEST_MODE.get("enabled") else _DASH_FORCE_OFF,
+    ))
+    await update.effective_message.reply_text(text)
 
-    await update.effective_message.reply_text("\n".join(lines))
+# Rendered /leaderboard text; invite counts move slowly, so it is served for up to a minute
+LEADERBOARD_CACHE_TTL = 60
+_leaderboard_cache: Dict[str, Any] = {"expires_at": 0.0, "text": ""}
 
-async def leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    allowed = await record_user_and_check_ban(update, context)
-    if not allowed:
-        await update.effective_message.reply_text("🚫 You are banned.")
-        return
+def render_leaderboard() -> str:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -188,21 +208,34 @@ async def leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         """, (LEADERBOARD_LIMIT,))
         rows = cur.fetchall()
         cur.close()
-        conn.close()
     except Exception:
         rows = []
-    text = "📊 Invite Leaderboard (Top)\n\n"
+    finally:
+        if conn is not None:
+            conn.close()
+    lines = ["📊 Invite Leaderboard (Top)\n\n"]
     for i, row in enumerate(rows, 1):
         name = row.get('first_name') or f"User {row.get('telegram_id')}"
         invites = row.get('invite_count', 0)
-        text += f"{i}. {name} - {invites} invites\n"
-    await update.effective_message.reply_text(text)
+        lines.append(f"{i}. {name} - {invites} invites\n")
+    return "".join(lines)
+
+async def leaderboard_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    allowed = await record_user_and_check_ban(update, context)
+    if not allowed:
+        await update.effective_message.reply_text("🚫 You are banned.")
+        return
+    now = time.monotonic()
+    if _leaderboard_cache["expires_at"] <= now:
+        _leaderboard_cache["text"] = await asyncio.to_thread(render_leaderboard)
+        _leaderboard_cache["expires_at"] = now + LEADERBOARD_CACHE_TTL
+    await update.effective_message.reply_text(_leaderboard_cache["text"])
 
 async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_admin(update.effective_user.id):
         await update.effective_message.reply_text("❌ Admins only.")
         return
-    await update.effective_message.reply_text("Admin panel:", reply_markup=build_admin_menu())
+    await update.effective_message.reply_text("Admin panel:", reply_markup=ADMIN_MENU)
 
 async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_admin(update.effective_user.id):
@@ -244,7 +277,7 @@ async def reset_cooldown_command(update: Update, context: ContextTypes.DEFAULT_T
     except Exception:
         await update.effective_message.reply_text("Invalid id.")
         return
-    reset_cooldown(tid)
+    await asyncio.to_thread(reset_cooldown, tid)
     await update.effective_message.reply_text(f"Cooldown reset for {tid}.")
 
 async def user_stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -259,7 +292,7 @@ async def user_stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     except Exception:
         await update.effective_message.reply_text("Invalid id.")
         return
-    stats = get_user_stats(tid)
+    stats = await asyncio.to_thread(get_user_stats, tid)
     if not stats:
         await update.effective_message.reply_text("User not found.")
         return
@@ -267,13 +300,15 @@ async def user_stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     badge = stats['badge']
     rl = stats['rate_limits']
     saves = stats['save_count']
-    text = f"Stats for {user.get('first_name', 'User')} ({tid})\n\n"
-    text += f"Joined: {user.get('joined_at')}\nRequests: {user.get('request_count', 0)}\nInvites: {user.get('invite_count', 0)}\nBanned: {bool(user.get('is_banned'))}\n"
-    text += f"Badge: {badge['emoji']} {badge['name']}\nSaves: {saves}/{badge['save_slots'] if isinstance(badge['save_slots'], int) else '∞'}\n\n"
-    text += "Cooldowns:\n"
-    text += f"Minute: {rl.get('minute_count',0)}/{badge['limits'].get('min','∞')}\n"
-    text += f"Hour: {rl.get('hour_count',0)}/{badge['limits'].get('hour','∞')}\n"
-    text += f"Day: {rl.get('day_count',0)}/{badge['limits'].get('day','∞')}\n"
+    text = "".join((
+        f"Stats for {user.get('first_name', 'User')} ({tid})\n\n",
+        f"Joined: {user.get('joined_at')}\nRequests: {user.get('request_count', 0)}\nInvites: {user.get('invite_count', 0)}\nBanned: {bool(user.get('is_banned'))}\n",
+        f"Badge: {badge['emoji']} {badge['name']}\nSaves: {saves}/{badge['save_slots'] if isinstance(badge['save_slots'], int) else '∞'}\n\n",
+        "Cooldowns:\n",
+        f"Minute: {rl.get('minute_count',0)}/{badge['limits'].get('min','∞')}\n",
+        f"Hour: {rl.get('hour_count',0)}/{badge['limits'].get('hour','∞')}\n",
+        f"Day: {rl.get('day_count',0)}/{badge['limits'].get('day','∞')}\n",
+    ))
     await update.effective_message.reply_text(text)
 
 async def export_csv_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -289,7 +324,7 @@ async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     cancelled_something = False
 
     if ctx.pop("awaiting_manual_ai", None):
-        await update.effective_message.reply_text("Manual AI input cancelled.", reply_markup=build_admin_menu())
+        await update.effective_message.reply_text("Manual AI input cancelled.", reply_markup=ADMIN_MENU)
         cancelled_something = True
 
     task = ai_tasks.get(uid) or ctx.get("ai_task")
@@ -305,9 +340,9 @@ async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             cancelled_something = True
 
     if cancelled_something:
-        await update.effective_message.reply_text("All actions cancelled.", reply_markup=build_main_menu())
+        await update.effective_message.reply_text("All actions cancelled.", reply_markup=MAIN_MENU)
     else:
-        await update.effective_message.reply_text("Nothing to cancel.", reply_markup=build_main_menu())
+        await update.effective_message.reply_text("Nothing to cancel.", reply_markup=MAIN_MENU)
 
 async def latest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     allowed = await record_user_and_check_ban(update, context)
@@ -318,8 +353,7 @@ async def latest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     args = context.args or []
     if len(args) >= 2:
         platform = args[0].lower()
-        if platform in ("twitter",):
-            platform = "x"
+        platform = PLATFORM_ALIASES.get(platform, platform)
         account = args[1].lstrip('@')
 
         await handle_fetch_and_ai(update, context, platform, account)
@@ -327,7 +361,7 @@ async def latest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     context.user_data["awaiting_username"] = True
     context.user_data["platform"] = "x"
-    await update.effective_message.reply_text("Send username (without @) — default platform X. Use /cancel to abort.", reply_markup=build_back_markup("menu_main"))
+    await update.effective_message.reply_text("Send username (without @) — default platform X. Use /cancel to abort.", reply_markup=BACK_MAIN)
 
 async def testmode_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin-only toggle for test mode."""
@@ -372,22 +406,7 @@ async def reset_all_cooldowns_command(update: Update, context: ContextTypes.DEFA
         return
 
     try:
-        conn = get_tg_db()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE tg_rate_limits
-            SET 
-                minute_count = 0,
-                hour_count = 0,
-                day_count = 0,
-                minute_reset = NULL,
-                hour_reset = NULL,
-                day_reset = NULL
-        """)
-        affected = cur.rowcount
-        conn.commit()
-        cur.close()
-        conn.close()
+        affected = await asyncio.to_thread(reset_all_cooldowns)
 
         await update.effective_message.reply_text(
             f"✅ <b>Global cooldown reset complete!</b>\n"
@@ -441,43 +460,83 @@ async def privacy_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.effective_message.reply_text(privacy_text, parse_mode="HTML", disable_web_page_preview=True)
 
+async def cache_bot_username(application):
+    try:
+        application.bot_data["bot_username"] = (await application.bot.get_me()).username
+    except Exception as e:
+        print(f"[startup] get_me failed: {e}")
+
+async def post_init(application):
+    """Startup hook: cache the bot username, start the write flusher, publish command lists."""
+    if application.job_queue:
+        application.job_queue.run_repeating(
+            flush_user_writes,
+            interval=USER_WRITE_FLUSH_SECONDS,
+            first=USER_WRITE_FLUSH_SECONDS,
+            name="flush_user_writes"
+        )
+    # Independent Bot API round-trips; run them side by side
+    await asyncio.gather(
+        cache_bot_username(application),
+        set_command_visibility(application),
+        return_exceptions=True,
+    )
+
+async def post_shutdown(application):
+    """Shutdown hook: write out any buffered user accounting before exit."""
+    try:
+        await drain_user_writes()
+    except Exception as e:
+        print(f"[shutdown] flushing user writes failed: {e}")
+
+# Command menus published by set_command_visibility
+PUBLIC_CMDS = [
+    BotCommand("start", "Show welcome / menu"),
+    BotCommand("menu", "Open main menu"),
+    BotCommand("latest", "Get latest posts for a username"),
+    BotCommand("saved_list", "List your saved usernames"),
+    BotCommand("save", "Save a username for quick sending"),
+    BotCommand("benefits", "See badge benefits"),
+    BotCommand("dashboard", "View your status"),
+    BotCommand("leaderboard", "Top inviters"),
+    BotCommand("help", "Show help"),
+]
+
+ADMIN_CMDS = [
+    BotCommand("admin", "Open admin panel"),
+    BotCommand("ban", "Ban a user (admin only)"),
+    BotCommand("unban", "Unban a user (admin only)"),
+    BotCommand("reset_cooldown", "Reset user cooldown"),
+    BotCommand("user_stats", "View user stats"),
+    BotCommand("export_csv", "Export users CSV (admin only)"),
+    BotCommand("reset_all_cooldowns", "Reset cooldown for ALL users (admin only)"),
+]
+
+# One private-chat scope per admin, paired with ADMIN_IDS order
+ADMIN_SCOPES = [(admin_id, BotCommandScopeChat(chat_id=admin_id)) for admin_id in ADMIN_IDS]
+
 # Command visibility function (kept here or moved to a separate file)
 async def set_command_visibility(application):
     """Set bot commands for public and admin users."""
-    public_cmds = [
-        BotCommand("start", "Show welcome / menu"),
-        BotCommand("menu", "Open main menu"),
-        BotCommand("latest", "Get latest posts for a username"),
-        BotCommand("saved_list", "List your saved usernames"),
-        BotCommand("save", "Save a username for quick sending"),
-        BotCommand("benefits", "See badge benefits"),
-        BotCommand("dashboard", "View your status"),
-        BotCommand("leaderboard", "Top inviters"),
-        BotCommand("help", "Show help"),
-    ]
-    try:
-        await application.bot.set_my_commands(public_cmds, scope=BotCommandScopeDefault())
-    except Exception as e:
-        print(f"[commands] failed to set public commands: {e}")
-
-    admin_cmds = [
-        BotCommand("admin", "Open admin panel"),
-        BotCommand("ban", "Ban a user (admin only)"),
-        BotCommand("unban", "Unban a user (admin only)"),
-        BotCommand("reset_cooldown", "Reset user cooldown"),
-        BotCommand("user_stats", "View user stats"),
-        BotCommand("export_csv", "Export users CSV (admin only)"),
-        BotCommand("reset_all_cooldowns", "Reset cooldown for ALL users (admin only)"),
-    ]
+    # Public and per-admin scopes are independent: one round-trip for all of them
+    public_result, *results = await asyncio.gather(
+        application.bot.set_my_commands(PUBLIC_CMDS, scope=BotCommandScopeDefault()),
+        *[application.bot.set_my_commands(ADMIN_CMDS, scope=scope) for _, scope in ADMIN_SCOPES],
+        return_exceptions=True,
+    )
+    if isinstance(public_result, Exception):
+        print(f"[commands] failed to set public commands: {public_result}")
+
+    failed = False
+    for (admin_id, _), result in zip(ADMIN_SCOPES, results):
+        if isinstance(result, Exception):
+            failed = True
+            print(f"[commands] failed to set admin commands for {admin_id}: {result}. Falling back to default scope.")
+        else:
+            print(f"[commands] admin commands set for private chat {admin_id}")
 
-    for admin_id in ADMIN_IDS:
+    if failed:
         try:
-            scope = BotCommandScopeChat(chat_id=admin_id)
-            await application.bot.set_my_commands(admin_cmds, scope=scope)
-            print(f"[commands] admin commands set for private chat {admin_id}")
-        except Exception as e:
-            print(f"[commands] failed to set admin commands for {admin_id}: {e}. Falling back to default scope.")
-            try:
-                await application.bot.set_my_commands(admin_cmds, scope=BotCommandScopeDefault())
-            except Exception as e2:
-                print(f"[commands] fallback failed: {e2}")
\ No newline at end of file
+            await application.bot.set_my_commands(ADMIN_CMDS, scope=BotCommandScopeDefault())
+        except Exception as e2:
+            print(f"[commands] fallback failed: {e2}")
@@ -1,4 +1,10 @@
+import asyncio
+import html
 import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.ext import ContextTypes
 from telegram.constants import ChatAction
@@ -9,6 +15,65 @@ from typing import Dict, Optional, Any, Tuple, Callable, List
 
 logger = logging.getLogger(__name__)
 
+# Raw upstream results keyed by (platform, normalized account), kept in LRU
+# order; a short TTL keeps "latest posts" fresh while letting paging, saved
+# sends and repeat fetches reuse them.
+POSTS_CACHE_TTL = 120
+POSTS_CACHE_MAX = 1024
+_posts_cache: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+
+# Per-scraper concurrency cap so bursts don't get us blocked upstream
+_fetch_sems = {p: asyncio.Semaphore(8) for p in ("x", "ig", "fb", "yt")}
+
+# Dedicated threads for the sync scrapers so slow upstreams can't starve the
+# default executor used for DB calls and media downloads
+_FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch")
+
+# In-flight fetches by cache key: concurrent misses for the same account share one upstream call
+_posts_inflight: Dict[Tuple[str, str], "asyncio.Task"] = {}
+
+async def get_posts_cached(platform: str, account: str):
+    """Return the raw fetcher result for (platform, account), cached for POSTS_CACHE_TTL seconds."""
+    key = (platform, normalize_account(account, platform))
+    hit = _posts_cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        _posts_cache.move_to_end(key)
+        return hit[1]
+
+    if platform not in _fetch_sems:
+        return []
+    task = _posts_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_posts(key, platform, account))
+        _posts_inflight[key] = task
+        task.add_done_callback(lambda _t: _posts_inflight.pop(key, None))
+    # Shielded so one caller giving up doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
+
+async def _fetch_posts(key: Tuple[str, str], platform: str, account: str):
+    # Sync fetchers run on _FETCH_POOL so they don't stall the event loop
+    loop = asyncio.get_running_loop()
+    async with _fetch_sems[platform]:
+        if platform == "x":
+            posts = await loop.run_in_executor(_FETCH_POOL, fetch_latest_urls, "x", account)
+        elif platform == "ig":
+            posts = await fetch_ig_urls(account)
+        elif platform == "fb":
+            posts = await loop.run_in_executor(_FETCH_POOL, fetch_fb_urls, account)
+        else:
+            posts = await loop.run_in_executor(_FETCH_POOL, partial(fetch_yt_videos, channel_handle=account))
+
+    if posts:
+        if platform != "x":
+            # Render captions once per fetch instead of once per preview/send
+            for p in posts:
+                p["_caption"] = post_caption_html(p)
+        _posts_cache[key] = (time.monotonic() + POSTS_CACHE_TTL, posts)
+        _posts_cache.move_to_end(key)
+        while len(_posts_cache) > POSTS_CACHE_MAX:
+            _posts_cache.popitem(last=False)
+    return posts
+
 async def send_ai_button(message, count, platform, account, badge, context=None, auto_delete_after: int | None = None):
     """Send the AI analyze button."""
     button_text = f"Analyze {count} new post(s) with AI 🤖"
@@ -67,7 +132,7 @@ async def send_next_post_with_confirmation(update_or_query, context: ContextType
             context.user_data.pop(user_data_key, None)
             return
 
-        badge = get_user_badge(uid)
+        badge = await asyncio.to_thread(get_user_badge, uid)
         posts_to_store = pending.get("posts", [])[:] if pending else context.user_data.get(f"last_ai_context_{platform}_{account}", [])
         context.user_data[f"last_ai_context_{platform}_{account}"] = posts_to_store
 
@@ -97,8 +162,8 @@ async def send_next_post_with_confirmation(update_or_query, context: ContextType
     post = posts[current_idx]
 
     view_text = {"x": "View on 𝕏", "fb": "View on Facebook ⓕ", "ig": "View on Instagram 🅮", "yt": "View on YouTube 📺"}.get(platform, "View Post 🔗")
-    link_html = f"<a href='{post.get('post_url','')}'>{view_text}</a>" if post.get('post_url') else ""
-    caption = (post.get("caption") or "")[:1024]
+    link_html = f"<a href='{html.escape(post['post_url'])}'>{view_text}</a>" if post.get('post_url') else ""
+    caption = post_caption_html(post)
     full_caption = f"{link_html}\n\n{caption}" if link_html else caption
     preview_text = (full_caption + "\n\nMove to next post⏭️?") if full_caption else "Move to next post⏭️?"
 
@@ -167,10 +232,12 @@ async def send_next_post_with_confirmation(update_or_query, context: ContextType
     context.user_data[user_data_key] = pending
 
     try:
+        targets = []
         if preview_msg:
-            await schedule_delete(context, preview_msg.chat.id, preview_msg.message_id)
+            targets.append((preview_msg.chat.id, preview_msg.message_id))
         if edited and message:
-            await schedule_delete(context, message.chat.id, message.message_id)
+            targets.append((message.chat.id, message.message_id))
+        await schedule_delete_many(context, targets)
     except Exception as e:
         logger.debug("Failed to schedule delete: %s", e)
 
@@ -183,10 +250,14 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
 
     force_send = TEST_MODE.get("enabled", False)
 
+    if not is_valid_handle(platform, account):
+        await message.reply_text(INVALID_HANDLE_MSG)
+        return
+
     if is_admin(uid):
         pass  # no cooldown
     else:
-        cooldown_msg = check_and_increment_cooldown(uid)
+        cooldown_msg = await asyncio.to_thread(check_and_increment_cooldown, uid)
         if cooldown_msg:
             await message.reply_text(cooldown_msg)
             return
@@ -195,7 +266,7 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
 
     # Fetch raw posts
     if platform == "x":
-        raw_posts = fetch_latest_urls("x", account)
+        raw_posts = await get_posts_cached("x", account)
         post_list = [{"post_id": extract_post_id("x", url), "post_url": url, "caption": ""} for url in raw_posts]
 
     elif platform == "ig":
@@ -206,7 +277,7 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
         )
 
         try:
-            raw_ig = await fetch_ig_urls(account)
+            raw_ig = await get_posts_cached("ig", account)
         except Exception as e:
             await temp_msg.delete()
             await message.reply_text(f"❌ Failed to fetch Instagram posts: {e}")
@@ -222,11 +293,12 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
                 "post_id": pid,
                 "post_url": p['url'],
                 "caption": p.get("caption", ""),
+                "_caption": p.get("_caption"),
                 "media_url": p.get("url"),
             })
 
     elif platform == "fb":
-        raw_fb = fetch_fb_urls(account)
+        raw_fb = await get_posts_cached("fb", account)
         post_list = []
         for p in raw_fb:
             pid = p.get("post_id") or p.get("post_url", "")
@@ -234,18 +306,20 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
                 "post_id": pid,
                 "post_url": p['post_url'],
                 "caption": p.get("caption", ""),
+                "_caption": p.get("_caption"),
                 "media_url": p.get("media_url"),
                 "is_video": p.get("is_video", False)
             })
 
     elif platform == "yt":
-        raw_yt = fetch_yt_videos(channel_handle=account)
+        raw_yt = await get_posts_cached("yt", account)
         post_list = []
         for v in raw_yt:
             post_list.append({
                 "post_id": v["post_id"],
                 "post_url": v["post_url"],
                 "caption": v["caption"],
+                "_caption": v.get("_caption"),
                 "media_url": v["media_url"],
                 "is_video": True
             })
@@ -256,17 +330,19 @@ async def handle_fetch_and_ai(update, context, platform, account, query=None, fo
 
     clean_account = normalize_account(account, platform)
 
-    new_posts = [p for p in post_list if is_post_new(uid, platform, clean_account, p['post_id'])]
+    new_posts = await asyncio.to_thread(
+        lambda: [p for p in post_list if is_post_new(uid, platform, clean_account, p['post_id'])]
+    )
 
     if force_send:
         logging.info("🧪 Force mode ACTIVE for user %s — sending latest posts (ignoring seen status)", uid)
         new_posts = post_list[:POST_LIMIT]
-        mark_posts_seen(uid, platform, clean_account, [{"post_id": p['post_id'], "post_url": p['post_url']} for p in new_posts])
+        await asyncio.to_thread(mark_posts_seen, uid, platform, clean_account, [{"post_id": p['post_id'], "post_url": p['post_url']} for p in new_posts])
     elif not new_posts:
         await message.reply_text(f"No new posts from @{clean_account} since your last check.")
         return
     else:
-        mark_posts_seen(uid, platform, clean_account, [{"post_id": p['post_id'], "post_url": p['post_url']} for p in new_posts])
+        await asyncio.to_thread(mark_posts_seen, uid, platform, clean_account, [{"post_id": p['post_id'], "post_url": p['post_url']} for p in new_posts])
 
     context.user_data[f"pending_posts_{platform}_{clean_account}"] = {
         "posts": new_posts,
@@ -1,13 +1,20 @@
 import urllib.request
 from urllib.parse import urlparse
 import io
-import asyncio
 import csv
+import tempfile
+import html
+import re
+import asyncio
 import logging
-from typing import Dict, Optional, Any, Tuple, Callable, List
-from telegram import Update, Message, InlineKeyboardMarkup
+import time
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Optional, Any, Tuple, Callable, List, Iterable, BinaryIO
+from telegram import Update, Message, InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo
 from telegram.ext import ContextTypes
-from telegram.error import TelegramError
+from telegram.error import TelegramError, BadRequest
 from .settings import TEST_MODE
 from Utils.utils import *
 
@@ -32,6 +39,16 @@ def normalize_account(account: str, platform: str) -> str:
     acct = acct.lstrip("@").strip()
     return acct
 
+# X handles (or numeric user ids) and IG usernames; fb/yt take page names and search text
+HANDLE_RE = {"x": re.compile(r"[A-Za-z0-9_]{1,20}"), "ig": re.compile(r"[A-Za-z0-9_.]{1,30}")}
+INVALID_HANDLE_MSG = "Invalid username."
+
+def is_valid_handle(platform: str, account: str) -> bool:
+    """Cheap shape check so malformed x/ig usernames never reach a fetcher."""
+    rx = HANDLE_RE.get(platform)
+    return rx is None or rx.fullmatch(normalize_account(account, platform)) is not None
+
+@lru_cache(maxsize=4096)
 def get_invite_link(bot_username: str, user_id: int) -> str:
     return f"https://t.me/{bot_username}?start={user_id}"
 
@@ -133,9 +150,73 @@ async def safe_send_media_or_link(
         logger.error("Final text fallback failed: %s", e)
         return None
 
-async def download_media(url: str) -> bytes:
-    """Download media using urllib (no external deps) – async compatible."""
-    loop = asyncio.get_event_loop()
+POST_VIEW_TEXT = {"x": "View on X🐦", "fb": "View on Facebook 🌐", "ig": "View on Instagram 📸"}
+
+def post_caption_html(post: Dict[str, Any]) -> str:
+    """Escaped, 1024-char caption; uses the "_caption" stored at fetch time when present."""
+    cached = post.get("_caption")
+    if cached is not None:
+        return cached
+    return html.escape((post.get("caption") or "")[:1024], quote=False)
+
+def build_post_caption(platform: str, post: Dict[str, Any]) -> str:
+    """HTML caption for a delivered post: "View on …" link, then the caption."""
+    view_text = POST_VIEW_TEXT.get(platform, "View Post 🔗")
+    link_html = f"<a href='{html.escape(post['post_url'])}'>{view_text}</a>" if post.get('post_url') else ""
+    caption = post_caption_html(post)
+    return f"{link_html}\n\n{caption}" if link_html else caption
+
+async def send_post_media(target: Message, post: Dict[str, Any], media_bytes: bytes, caption: str) -> Message:
+    """Send downloaded post media into target's chat as a video or photo."""
+    def _send():
+        bio = io.BytesIO(media_bytes)
+        if post.get("is_video"):
+            bio.name = "video.mp4"
+            return target.reply_video(video=bio, caption=caption, parse_mode="HTML")
+        bio.name = "photo.jpg"
+        return target.reply_photo(photo=bio, caption=caption, parse_mode="HTML")
+    return await _send()
+
+# Caps how many outbound media sends run at once when fanning out
+send_semaphore = asyncio.Semaphore(5)
+
+async def bounded(coro):
+    """Await coro while holding a send_semaphore slot."""
+    async with send_semaphore:
+        return await coro
+
+# Telegram's album size limit for send_media_group
+MEDIA_GROUP_MAX = 10
+
+async def send_post_album(target: Message, platform: str, items: List[Tuple[int, Dict[str, Any], bytes]]) -> List[Message]:
+    """Send up to MEDIA_GROUP_MAX (idx, post, media_bytes) items as one album.
+
+    Falls back to one message per post if Telegram rejects the album.
+    """
+    # Build every caption before any network I/O; reused by the fallback path
+    captions = [build_post_caption(platform, post) for _, post, _ in items]
+    if len(items) > 1:
+        media = [
+            (InputMediaVideo if post.get("is_video") else InputMediaPhoto)(
+                media_bytes, caption=caption, parse_mode="HTML"
+            )
+            for (_, post, media_bytes), caption in zip(items, captions)
+        ]
+        try:
+            return list(await target.reply_media_group(media))
+        except BadRequest as e:
+            logger.warning("send_post_album: album rejected, sending individually: %s", e)
+
+    # One at a time so the posts land in the same order the album would have had
+    sent = []
+    for (idx, post, media_bytes), caption in zip(items, captions):
+        try:
+            sent.append(await send_post_media(target, post, media_bytes, caption))
+        except Exception as e:
+            logger.error("send_post_album: failed to send idx %s: %s", idx, e)
+    return sent
+
+def _download_media_sync(url: str) -> bytes:
     try:
         req = urllib.request.Request(
             url,
@@ -158,58 +239,174 @@ async def download_media(url: str) -> bytes:
         logging.error(f"Download error {url}: {e}")
         return None
 
+async def download_media(url: str) -> bytes:
+    """Download media using urllib (no external deps) – runs in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _download_media_sync, url)
+
+# Telegram's deleteMessages accepts at most this many ids per call
+DELETE_BATCH_MAX = 100
+
 async def delete_message(context: ContextTypes.DEFAULT_TYPE):
-    job = context.job
-    data = job.data
-    try:
-        await context.bot.delete_message(chat_id=data["chat_id"], message_id=data["message_id"])
-    except Exception:
-        pass
+    """Job callback: delete every (chat_id, message_id) in data["targets"].
 
-async def schedule_delete(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, delay_seconds: int = 86400):
-    if context.job_queue:
+    Ids are grouped per chat and removed with bulk deleteMessages calls;
+    bots without delete_messages (PTB < 20.8) fall back to one call per id.
+    """
+    targets = context.job.data.get("targets") or []
+    by_chat: Dict[int, List[int]] = defaultdict(list)
+    for c, m in targets:
+        by_chat[c].append(m)
+
+    bot = context.bot
+    if hasattr(bot, "delete_messages"):
+        calls = [
+            bot.delete_messages(chat_id=c, message_ids=ids[i:i + DELETE_BATCH_MAX])
+            for c, ids in by_chat.items()
+            for i in range(0, len(ids), DELETE_BATCH_MAX)
+        ]
+    else:
+        calls = [bot.delete_message(chat_id=c, message_id=m) for c, m in targets]
+    await asyncio.gather(*calls, return_exceptions=True)
+
+async def schedule_delete_many(context: ContextTypes.DEFAULT_TYPE, targets: List[Tuple[int, int]], delay_seconds: int = 86400):
+    """Schedule one job that deletes all targets together."""
+    targets = [t for t in targets if t]
+    if context.job_queue and targets:
         context.job_queue.run_once(
             delete_message,
             when=delay_seconds,
-            data={"chat_id": chat_id, "message_id": message_id},
-            name=f"delete_{message_id}"
+            data={"targets": targets},
+            name=f"delete_{targets[0][1]}_{len(targets)}"
         )
 
-async def record_user_and_check_ban(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+async def schedule_delete(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, delay_seconds: int = 86400):
+    await schedule_delete_many(context, [(chat_id, message_id)], delay_seconds)
+
+# Strong refs so fire-and-forget tasks aren't garbage collected mid-flight
+_background_tasks = set()
+
+def _log_background_error(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.debug("Background write failed: %s", task.exception())
+
+def _fire(fn: Callable, *args) -> None:
+    """Run a blocking accounting call in a worker thread without awaiting it."""
+    task = asyncio.create_task(asyncio.to_thread(fn, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_log_background_error)
+
+# Accounting writes buffered in memory and flushed by flush_user_writes
+USER_WRITE_FLUSH_SECONDS = 5
+# Flush early once this many users are waiting, instead of waiting for the job
+USER_WRITE_FLUSH_MAX = 500
+_pending_users: Dict[int, str] = {}
+_pending_counters: Dict[int, int] = defaultdict(int)
+
+async def drain_user_writes() -> None:
+    """Write buffered user upserts and request counts in bulk.
+
+    A batch that fails to write is merged back into the buffers for the next flush.
+    """
+    if not _pending_users and not _pending_counters:
+        return
+    # Swap the buffers before awaiting so concurrent drains never write twice
+    users = dict(_pending_users)
+    _pending_users.clear()
+    counters = dict(_pending_counters)
+    _pending_counters.clear()
+    try:
+        await asyncio.to_thread(bulk_upsert_tg_users, users)
+    except Exception:
+        logger.warning("drain_user_writes: %d user upserts failed, requeued", len(users), exc_info=True)
+        for tid, name in users.items():
+            _pending_users.setdefault(tid, name)  # a newer name buffered meanwhile wins
+    try:
+        await asyncio.to_thread(bulk_increment_tg_requests, counters)
+    except Exception:
+        logger.warning("drain_user_writes: %d request counts failed, requeued", len(counters), exc_info=True)
+        for tid, n in counters.items():
+            _pending_counters[tid] += n
+
+async def flush_user_writes(context: ContextTypes.DEFAULT_TYPE):
+    """Repeating job: see drain_user_writes."""
+    await drain_user_writes()
+
+def _maybe_flush_early() -> None:
+    if len(_pending_counters) + len(_pending_users) < USER_WRITE_FLUSH_MAX:
+        return
+    task = asyncio.create_task(drain_user_writes())
+    _background_tasks.add(task)
+    task.add_done_callback(_log_background_error)
+
+# telegram_id -> (expires_at, is_banned); lets repeat clicks skip the DB
+BAN_CACHE_TTL = 60
+# Upper bound on cached users; the oldest entry is evicted first
+BAN_CACHE_MAX = 50_000
+_ban_cache: Dict[int, Tuple[float, bool]] = {}
+
+def set_ban_cache(tid: int, banned: bool) -> None:
+    """Store tid's ban status for BAN_CACHE_TTL seconds (write-through after ban/unban)."""
+    _ban_cache.pop(tid, None)
+    if len(_ban_cache) >= BAN_CACHE_MAX:
+        _ban_cache.pop(next(iter(_ban_cache)), None)
+    _ban_cache[tid] = (time.monotonic() + BAN_CACHE_TTL, banned)
+
+def invalidate_ban_cache(tid: int) -> None:
+    """Forget the cached ban status for tid."""
+    _ban_cache.pop(tid, None)
+
+async def record_user_and_check_ban(update: Update, context: ContextTypes.DEFAULT_TYPE, count_request: bool = True) -> bool:
+    """Return False if the user is banned.
+
+    The ban flag is read (and the name refresh queued) only when the cached
+    status has expired; the request counter is buffered only if count_request.
+    """
     user = update.effective_user
     if not user:
         return True
     tid = user.id
-    first_name = user.first_name or ""
-    try:
-        add_or_update_tg_user(tid, first_name)
-    except Exception:
-        pass
+
+    if count_request:
+        _pending_counters[tid] += 1
+        _maybe_flush_early()
+
+    now = time.monotonic()
+    hit = _ban_cache.get(tid)
+    if hit and hit[0] > now:
+        return not hit[1]
+
     try:
-        increment_tg_request_count(tid)
+        row = await asyncio.to_thread(get_tg_user, tid)
     except Exception:
-        pass
+        return True
+    if row:
+        _pending_users[tid] = user.first_name or ""
+    else:
+        # First sighting: create the row now so lookups right after /start see it
+        _fire(add_or_update_tg_user, tid, user.first_name or "")
+    banned = bool(row and int(row.get("is_banned", 0)) == 1)
+    set_ban_cache(tid, banned)
+    return not banned
+
+# Exports up to this size stay in memory; larger ones spill to a temp file
+CSV_SPOOL_MAX = 1 << 20
+USER_CSV_FIELDS = ("telegram_id", "first_name", "is_active", "is_banned", "request_count", "last_request_at", "joined_at", "invite_count")
+
+def write_users_csv(users_iter: Iterable[Dict[str, Any]]) -> BinaryIO:
+    """Encode users as UTF-8 CSV into a spooled temp file, rewound and ready to upload."""
+    out = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MAX, mode="w+b")
+    tw = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(tw)
+    writer.writerow(USER_CSV_FIELDS)
+    get_row = itemgetter(*USER_CSV_FIELDS)
     try:
-        row = get_tg_user(tid)
-        if row and int(row.get("is_banned", 0)) == 1:
-            return False
+        writer.writerows(get_row(u) for u in users_iter)
     except Exception:
-        pass
-    return True
-
-def users_to_csv_bytes(users: List[Dict[str, Any]]) -> bytes:
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["telegram_id", "first_name", "is_active", "is_banned", "request_count", "last_request_at", "joined_at", "invite_count"])
-    for u in users:
-        writer.writerow([
-            u.get("telegram_id"),
-            u.get("first_name"),
-            u.get("is_active"),
-            u.get("is_banned"),
-            u.get("request_count"),
-            u.get("last_request_at"),
-            u.get("joined_at"),
-            u.get("invite_count"),
-        ])
-    return buf.getvalue().encode("utf-8")
\ No newline at end of file
+        tw.close()  # closes out too; a detached-but-live wrapper would flush into it later
+        raise
+    tw.flush()
+    tw.detach()
+    out.seek(0)
+    return out
\ No newline at end of file
@@ -1,9 +1,10 @@
+import re
 import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from telegram.error import Forbidden
 from telegram.constants import ChatAction
-from openai import AsyncOpenAI
 import os
 from typing import Dict, Optional, Any, Tuple, Callable, List
 from .settings import *
@@ -15,18 +16,28 @@ from Utils.utils import *
 
 logger = logging.getLogger(__name__)
 
+# "/cmd <id> [rest]": arg is the first token, sid is set only when it is an integer
+_CMD_ID_RE = re.compile(r"^\S+(?:\s+(?P<arg>(?P<sid>-?\d+)|\S+)(?:\s+(?P<rest>.+))?)?$", re.S)
+
+# Recipients dispatched per gather; the application's AIORateLimiter paces and retries the sends
+BROADCAST_CHUNK = 1000
+
+# One running broadcast per admin; handlers run concurrently (block=False)
+_broadcast_locks: Dict[int, asyncio.Lock] = {}
+
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not update.message or not update.message.text:
+    msg = update.message
+    if not msg or not msg.text:
         return
 
     uid = update.effective_user.id
-    badge = get_user_badge(uid)
+    badge = await asyncio.to_thread(get_user_badge, uid)
 
     # AI Follow-up Chat (only Diamond & Admin)
     if context.user_data.get("ai_chat_active") and badge['name'] in ('Diamond', 'Admin'):
         chat_context = context.user_data["ai_chat_active"]
         posts = chat_context["posts"]
-        question = update.message.text.strip()
+        question = msg.text.strip()
 
         captions_text = "\n---\n".join([
             p.get("caption", "No caption") or ""
@@ -48,9 +59,10 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     "- Stay engaging and make the user think deeper about the content"
     """
 
-        await update.message.chat.send_action(ChatAction.TYPING)
+        await msg.chat.send_action(ChatAction.TYPING)
 
         try:
+            from openai import AsyncOpenAI
             client = AsyncOpenAI(
                 api_key=os.getenv("GROQ_KEY"),
                 base_url="https://api.groq.com/openai/v1"
@@ -62,13 +74,13 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 max_tokens=500
             )
             answer = response.choices[0].message.content.strip()
-            await update.message.reply_text(
+            await msg.reply_text(
                 f"🤖 <b>AI Follow-up</b>:\n\n{answer}\n\n<i>Reply again for more questions!</i>",
                 parse_mode="HTML"
             )
         except Exception as e:
             logging.error(f"AI follow-up failed: {e}")
-            await update.message.reply_text("🤖 AI temporary unavailable. Try again later.")
+            await msg.reply_text("🤖 AI temporary unavailable. Try again later.")
 
         return
 
@@ -76,13 +88,13 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif context.user_data.get("awaiting_manual_ai"):
         if not is_admin(uid):
             context.user_data.pop("awaiting_manual_ai", None)
-            await update.effective_message.reply_text("❌ Only admins can use Manual AI.")
+            await msg.reply_text("❌ Only admins can use Manual AI.")
             return
 
-        user_text = update.message.text.strip()
+        user_text = msg.text.strip()
 
         if not user_text:
-            await update.effective_message.reply_text(
+            await msg.reply_text(
                 "📝 Send the text, post, link, or caption you want analyzed.\n"
                 "I go analyze each one sharp-sharp.\n"
                 "/cancel to stop Manual AI mode."
@@ -101,19 +113,19 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ai_tasks[uid] = task
         context.user_data["ai_task"] = task
 
-        await update.effective_message.reply_text(
+        await msg.reply_text(
             "🚀 AI dey think on top your text...\n"
             "Hold...."
         )
         return
 
-    text = update.message.text.strip().lower()
+    text = msg.text.strip().lower()
 
     # Detect Facebook single post share links
     if ("facebook.com/share/" in text or "mibextid=" in text or 
         text.startswith("https://www.facebook.com/") or text.startswith("https://fb.watch/")):
-        clean_link = update.message.text.split("?")[0].rstrip("/")
-        await update.message.reply_text(
+        clean_link = msg.text.split("?")[0].rstrip("/")
+        await msg.reply_text(
             f"🌐 Single Facebook post:\n{clean_link}",
             disable_web_page_preview=False
         )
@@ -123,64 +135,77 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.user_data.get("admin_broadcast"):
         if not is_admin(uid):
             context.user_data.pop("admin_broadcast", None)
-            await update.effective_message.reply_text("❌ Only admins can broadcast.")
+            await msg.reply_text("❌ Only admins can broadcast.")
+            return
+        lock = _broadcast_locks.setdefault(uid, asyncio.Lock())
+        if lock.locked():
+            await msg.reply_text("A broadcast is already running. Send /cancel to abort it first.")
+            return
+        async with lock:
+            text_to_send = msg.text
+            await msg.reply_text("Broadcast starting... (send /cancel to abort while it runs)")
+            users = await asyncio.to_thread(list_active_tg_users, limit=10000)
+            sent = 0
+            failed = 0
+            cancelled = False
+
+            # Users who blocked the bot; marked inactive in one UPDATE at the end
+            blocked: List[int] = []
+
+            async def _send(u):
+                try:
+                    await context.bot.send_message(chat_id=u.get("telegram_id"), text=text_to_send)
+                    return True
+                except Forbidden:
+                    blocked.append(u.get("telegram_id"))
+                    return False
+                except Exception:
+                    return False
+
+            # Fan out one chunk at a time so /cancel is honoured between chunks
+            for start in range(0, len(users), BROADCAST_CHUNK):
+                if not context.user_data.get("admin_broadcast"):
+                    cancelled = True
+                    break
+                results = await asyncio.gather(*(_send(u) for u in users[start:start + BROADCAST_CHUNK]))
+                ok = sum(results)
+                sent += ok
+                failed += len(results) - ok
+            context.user_data.pop("admin_broadcast", None)
+            if blocked:
+                await asyncio.to_thread(deactivate_tg_users, blocked)
+            summary = f"Sent: {sent}, failed: {failed} ({len(blocked)} blocked the bot, marked inactive)"
+            if cancelled:
+                await msg.reply_text(f"Broadcast cancelled. {summary}")
+            else:
+                await msg.reply_text(f"Broadcast done. {summary}")
             return
-        text_to_send = update.message.text
-        await update.effective_message.reply_text("Broadcast starting... (send /cancel to abort while it runs)")
-        users = list_active_tg_users(limit=10000)
-        sent = 0
-        failed = 0
-        cancelled = False
-        for u in users:
-            if not context.user_data.get("admin_broadcast"):
-                cancelled = True
-                break
-            try:
-                await context.bot.send_message(chat_id=u.get("telegram_id"), text=text_to_send)
-                sent += 1
-                await asyncio.sleep(0.05)
-            except Exception:
-                failed += 1
-        context.user_data.pop("admin_broadcast", None)
-        if cancelled:
-            await update.effective_message.reply_text(f"Broadcast cancelled. Sent so far: {sent}, failed: {failed}")
-        else:
-            await update.effective_message.reply_text(f"Broadcast done. Sent: {sent}, failed: {failed}")
-        return
 
     # Rename flow
     if context.user_data.get("awaiting_rename_id"):
         sid = context.user_data.pop("awaiting_rename_id")
-        new_label = update.message.text.strip()
-        ok = update_saved_account_label(uid, sid, new_label)
+        new_label = msg.text.strip()
+        ok = await asyncio.to_thread(update_saved_account_label, uid, sid, new_label)
         if ok:
-            await update.effective_message.reply_text(f"Saved account {sid} renamed to: {new_label}", reply_markup=build_saved_menu())
+            await msg.reply_text(f"Saved account {sid} renamed to: {new_label}", reply_markup=SAVED_MENU)
         else:
-            await update.effective_message.reply_text("Could not rename saved account.", reply_markup=build_saved_menu())
+            await msg.reply_text("Could not rename saved account.", reply_markup=SAVED_MENU)
         return
 
     # Add saved flow
     if context.user_data.get("awaiting_save"):
-        text = update.message.text.strip()
+        text = msg.text.strip()
         parts = text.split(maxsplit=2)
         if len(parts) < 2:
-            await update.effective_message.reply_text("Send: <platform> <username_or_url> [label]")
+            await msg.reply_text("Send: <platform> <username_or_url> [label]")
             return
 
-        platform_input = parts[0].lower()
+        platform = PLATFORM_ALIASES.get(parts[0].lower())
         raw_input = parts[1].strip()
         label = parts[2] if len(parts) == 3 else None
 
-        if platform_input in ("twitter", "x"):
-            platform = "x"
-        elif platform_input in ("instagram", "ig"):
-            platform = "ig"
-        elif platform_input in ("facebook", "fb"):
-            platform = "fb"
-        elif platform_input in ("youtube", "yt"):
-            platform = "yt"
-        else:
-            await update.effective_message.reply_text("Platform must be: x, ig, fb, or yt (YouTube)")
+        if platform is None:
+            await msg.reply_text("Platform must be: x, ig, fb, or yt (YouTube)")
             return
 
         account = raw_input
@@ -190,36 +215,36 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 if "facebook.com" in raw_input or "fb.com" in raw_input:
                     account = raw_input.split('?')[0].rstrip('/')
                 else:
-                    await update.effective_message.reply_text("Invalid Facebook URL.")
+                    await msg.reply_text("Invalid Facebook URL.")
                     context.user_data.pop("awaiting_save", None)
                     return
             elif platform == "yt":
                 if "youtube.com" in raw_input or "youtu.be" in raw_input:
                     account = raw_input
                 else:
-                    await update.effective_message.reply_text("Invalid YouTube link.")
+                    await msg.reply_text("Invalid YouTube link.")
                     context.user_data.pop("awaiting_save", None)
                     return
             else:
-                await update.effective_message.reply_text("Full URLs only supported for fb and yt.")
+                await msg.reply_text("Full URLs only supported for fb and yt.")
                 context.user_data.pop("awaiting_save", None)
                 return
         else:
-            cleaned = raw_input.lstrip("@").strip()
-            if cleaned.isdigit() and len(cleaned) >= 10:
-                account = cleaned
-            else:
-                account = cleaned
+            account = raw_input.lstrip("@").strip()
+            if not is_valid_handle(platform, account):
+                await msg.reply_text(INVALID_HANDLE_MSG)
+                context.user_data.pop("awaiting_save", None)
+                return
 
-        current_count = count_saved_accounts(uid)
+        current_count = await asyncio.to_thread(count_saved_accounts, uid)
         save_slots = badge.get('save_slots')
         if isinstance(save_slots, (int, float)) and current_count >= save_slots:
-            await update.effective_message.reply_text(f"You've reached your save limit ({int(save_slots)}). Invite friends to upgrade!")
+            await msg.reply_text(f"You've reached your save limit ({int(save_slots)}). Invite friends to upgrade!")
             context.user_data.pop("awaiting_save", None)
             return
 
         try:
-            saved = save_user_account(uid, platform, account, label)
+            saved = await asyncio.to_thread(save_user_account, uid, platform, account, label)
             if account.startswith("http"):
                 if platform == "fb":
                     display_name = account.split('/')[-1] or "Facebook Page"
@@ -236,23 +261,23 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 else:
                     display_name = f"@{account}"
 
-            await update.effective_message.reply_text(
+            await msg.reply_text(
                 f"✅ Saved {platform.upper()} account:\n"
                 f"{display_name}\n"
                 f"Label: {label or 'None'}\n"
                 f"ID: {saved.get('id')}",
-                reply_markup=build_saved_menu()
+                reply_markup=SAVED_MENU
             )
         except Exception as e:
             logging.error(f"Save error for user {uid}: {e}")
-            await update.effective_message.reply_text(f"❌ Error saving: {str(e)}", reply_markup=build_saved_menu())
+            await msg.reply_text(f"❌ Error saving: {str(e)}", reply_markup=SAVED_MENU)
 
         context.user_data.pop("awaiting_save", None)
         return
 
     # Prompted username flow (from menu)
     if context.user_data.get("awaiting_username"):
-        raw_input = update.message.text.strip()
+        raw_input = msg.text.strip()
         platform = context.user_data.get("platform", "x")
         context.user_data["awaiting_username"] = False
 
@@ -268,165 +293,155 @@ async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await handle_fetch_and_ai(update, context, platform, account)
         return
 
-    # /saved_send command
-    if text.startswith("/saved_send"):
-        parts = text.split()
-        if len(parts) < 2:
-            await update.effective_message.reply_text("Usage: /saved_send <id>")
-            return
-        try:
-            sid = int(parts[1])
-        except:
-            await update.effective_message.reply_text("Invalid id.")
-            return
-        saved = get_saved_account(uid, sid)
-        if not saved:
-            await update.effective_message.reply_text("Saved account not found.")
-            return
-        await handle_fetch_and_ai(update, context, saved["platform"], saved["account_name"])
+    # Default fallback
+    await record_user_and_check_ban(update, context)
+    await msg.reply_text("Use the menu or /help for commands.")
+
+async def saved_send_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/saved_send <id>: fetch a saved account now."""
+    msg = update.effective_message
+    uid = update.effective_user.id
+    m = _CMD_ID_RE.match(msg.text.strip())
+    if not m["arg"]:
+        await msg.reply_text("Usage: /saved_send <id>")
+        return
+    if m["sid"] is None:
+        await msg.reply_text("Invalid id.")
+        return
+    sid = int(m["sid"])
+    saved = await asyncio.to_thread(get_saved_account, uid, sid)
+    if not saved:
+        await msg.reply_text("Saved account not found.")
         return
+    await handle_fetch_and_ai(update, context, saved["platform"], saved["account_name"])
 
-    # /saved_remove
-    if text.startswith("/saved_remove"):
-        parts = text.split()
-        if len(parts) < 2:
-            await update.effective_message.reply_text("Usage: /saved_remove <id>")
-            return
-        try:
-            sid = int(parts[1])
-        except:
-            await update.effective_message.reply_text("Invalid id.")
-            return
-        ok = remove_saved_account(uid, sid)
-        await update.effective_message.reply_text(
-            f"Removed saved account {sid}." if ok else "Could not remove account."
+async def saved_remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/saved_remove <id>"""
+    msg = update.effective_message
+    uid = update.effective_user.id
+    m = _CMD_ID_RE.match(msg.text.strip())
+    if not m["arg"]:
+        await msg.reply_text("Usage: /saved_remove <id>")
+        return
+    if m["sid"] is None:
+        await msg.reply_text("Invalid id.")
+        return
+    sid = int(m["sid"])
+    ok = await asyncio.to_thread(remove_saved_account, uid, sid)
+    await msg.reply_text(
+        f"Removed saved account {sid}." if ok else "Could not remove account."
+    )
+
+async def saved_rename_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/saved_rename <id> <new label>"""
+    msg = update.effective_message
+    uid = update.effective_user.id
+    m = _CMD_ID_RE.match(msg.text.strip())
+    if not m["rest"]:
+        await msg.reply_text("Usage: /saved_rename <id> <new label>")
+        return
+    if m["sid"] is None:
+        await msg.reply_text("Invalid id.")
+        return
+    sid = int(m["sid"])
+    new_label = m["rest"].strip()
+    ok = await asyncio.to_thread(update_saved_account_label, uid, sid, new_label)
+    await msg.reply_text(
+        f"Renamed account {sid} → {new_label}" if ok else "Could not rename account."
+    )
+
+async def save_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/save <platform> <username_or_url> [label] (direct command version)."""
+    msg = update.effective_message
+    uid = update.effective_user.id
+    text = msg.text.strip()
+    parts = text.split(maxsplit=3)
+    if len(parts) < 3:
+        await msg.reply_text(
+            "Usage: /save <platform> <username_or_url> [label]\n\n"
+            "Examples:\n"
+            "/save x elonmusk\n"
+            "/save ig davido\n"
+            "/save fb https://www.facebook.com/BBCNews BBC News\n"
+            "/save yt @MrBeast"
         )
         return
 
-    # /saved_rename
-    if text.startswith("/saved_rename"):
-        parts = text.split(maxsplit=2)
-        if len(parts) < 3:
-            await update.effective_message.reply_text("Usage: /saved_rename <id> <new label>")
-            return
-        try:
-            sid = int(parts[1])
-        except:
-            await update.effective_message.reply_text("Invalid id.")
-            return
-        new_label = parts[2].strip()
-        ok = update_saved_account_label(uid, sid, new_label)
-        await update.effective_message.reply_text(
-            f"Renamed account {sid} → {new_label}" if ok else "Could not rename account."
-        )
+    platform = PLATFORM_ALIASES.get(parts[1].lower())
+    raw_input = parts[2].strip()
+    label = parts[3] if len(parts) == 4 else None
+
+    if platform is None:
+        await msg.reply_text("Platform must be x, ig, fb, or yt")
         return
 
-    # /save command (direct command version)
-    if text.startswith("/save"):
-        parts = text.split(maxsplit=3)
-        if len(parts) < 3:
-            await update.effective_message.reply_text(
-                "Usage: /save <platform> <username_or_url> [label]\n\n"
-                "Examples:\n"
-                "/save x elonmusk\n"
-                "/save ig davido\n"
-                "/save fb https://www.facebook.com/BBCNews BBC News\n"
-                "/save yt @MrBeast"
-            )
+    account = raw_input
+    if raw_input.startswith("http"):
+        if platform not in ("fb", "yt"):
+            await msg.reply_text("Full URLs only for fb and yt")
             return
-
-        platform_input = parts[1].lower()
-        raw_input = parts[2].strip()
-        label = parts[3] if len(parts) == 4 else None
-
-        if platform_input in ("twitter", "x"):
-            platform = "x"
-        elif platform_input in ("instagram", "ig"):
-            platform = "ig"
-        elif platform_input in ("facebook", "fb"):
-            platform = "fb"
-        elif platform_input in ("youtube", "yt"):
-            platform = "yt"
-        else:
-            await update.effective_message.reply_text("Platform must be x, ig, fb, or yt")
+        if platform == "fb" and not ("facebook.com" in raw_input or "fb.com" in raw_input):
+            await msg.reply_text("Invalid Facebook URL")
             return
-
-        account = raw_input
-        if raw_input.startswith("http"):
-            if platform not in ("fb", "yt"):
-                await update.effective_message.reply_text("Full URLs only for fb and yt")
-                return
-            if platform == "fb" and not ("facebook.com" in raw_input or "fb.com" in raw_input):
-                await update.effective_message.reply_text("Invalid Facebook URL")
-                return
-            if platform == "yt" and not ("youtube.com" in raw_input or "youtu.be" in raw_input):
-                await update.effective_message.reply_text("Invalid YouTube link")
-                return
-            account = raw_input.split('?')[0].rstrip('/') if platform == "fb" else raw_input
-        else:
-            account = raw_input.lstrip('@')
-
-        current_count = count_saved_accounts(uid)
-        save_slots = badge.get('save_slots')
-        if isinstance(save_slots, (int, float)) and current_count >= save_slots:
-            await update.effective_message.reply_text(f"Save limit reached ({int(save_slots)})")
+        if platform == "yt" and not ("youtube.com" in raw_input or "youtu.be" in raw_input):
+            await msg.reply_text("Invalid YouTube link")
+            return
+        account = raw_input.split('?')[0].rstrip('/') if platform == "fb" else raw_input
+    else:
+        account = raw_input.lstrip('@')
+        if not is_valid_handle(platform, account):
+            await msg.reply_text(INVALID_HANDLE_MSG)
             return
 
-        try:
-            saved = save_user_account(uid, platform, account, label)
-            if account.startswith("http"):
-                display = account.split('/')[-1] or account
-            else:
-                display = "@" + account
-
-            await update.effective_message.reply_text(
-                f"✅ Saved {platform.upper()}:\n{display}\nLabel: {label or 'None'}\nID: {saved.get('id')}"
-            )
-        except Exception as e:
-            await update.effective_message.reply_text(f"❌ Save failed: {e}")
+    current_count = await asyncio.to_thread(count_saved_accounts, uid)
+    save_slots = (await asyncio.to_thread(get_user_badge, uid)).get('save_slots')
+    if isinstance(save_slots, (int, float)) and current_count >= save_slots:
+        await msg.reply_text(f"Save limit reached ({int(save_slots)})")
         return
 
-    # /saved_list
-    if text.startswith("/saved_list"):
-        items = list_saved_accounts(uid)
-        if not items:
-            await update.effective_message.reply_text("No saved accounts yet. Use /save to add one.")
-            return
-
-        text_out = "Your saved accounts:\n\n"
-        rows = []
-        for it in items:
-            sid = it["id"]
-            plat = it["platform"].upper()
-            acc = it["account_name"]
-            lbl = it.get("label") or ""
-
-            if acc.startswith("http"):
-                if plat == "FB":
-                    name = acc.split('/')[-1] or "Page"
-                elif plat == "YT":
-                    name = acc.split('@')[-1] if '@' in acc else acc.split('/')[-1]
-                else:
-                    name = acc
-                display = f"{sid}. [{plat}] {name}"
-            else:
-                display = f"{sid}. [{plat}] @{acc}"
+    try:
+        saved = await asyncio.to_thread(save_user_account, uid, platform, account, label)
+        if account.startswith("http"):
+            display = account.split('/')[-1] or account
+        else:
+            display = "@" + account
 
-            if lbl:
-                display += f" — {lbl}"
+        await msg.reply_text(
+            f"✅ Saved {platform.upper()}:\n{display}\nLabel: {label or 'None'}\nID: {saved.get('id')}"
+        )
+    except Exception as e:
+        await msg.reply_text(f"❌ Save failed: {e}")
 
-            text_out += display + "\n"
+async def saved_list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/saved_list: list saved accounts with inline actions."""
+    msg = update.effective_message
+    uid = update.effective_user.id
+    items = await asyncio.to_thread(list_saved_accounts, uid)
+    if not items:
+        await msg.reply_text("No saved accounts yet. Use /save to add one.")
+        return
 
-            rows.append([
-                InlineKeyboardButton(f"Send", callback_data=f"saved_sendcb_{sid}"),
-                InlineKeyboardButton("Rename", callback_data=f"saved_rename_start_{sid}"),
-                InlineKeyboardButton("Remove", callback_data=f"saved_removecb_{sid}")
-            ])
+    lines = ["Your saved accounts:\n\n"]
+    for it in items:
+        sid = it["id"]
+        plat = it["platform"].upper()
+        acc = it["account_name"]
+        lbl = it.get("label") or ""
+
+        if acc.startswith("http"):
+            if plat == "FB":
+                name = acc.split('/')[-1] or "Page"
+            elif plat == "YT":
+                name = acc.split('@')[-1] if '@' in acc else acc.split('/')[-1]
+            else:
+                name = acc
+            display = f"{sid}. [{plat}] {name}"
+        else:
+            display = f"{sid}. [{plat}] @{acc}"
 
-        rows.append([InlineKeyboardButton("↩️ Back to Menu", callback_data="saved_menu")])
-        await update.effective_message.reply_text(text_out, reply_markup=InlineKeyboardMarkup(rows))
-        return
+        lbl_suffix = f" — {lbl}" if lbl else ""
+        lines.append(f"{display}{lbl_suffix}\n")
 
-    # Default fallback
-    await record_user_and_check_ban(update, context)
-    await update.effective_message.reply_text("Use the menu or /help for commands.")
\ No newline at end of file
+    rows = [build_saved_row(it["id"]) for it in items]
+    rows.append([SAVED_BACK_TO_MENU_BTN])
+    await msg.reply_text("".join(lines), reply_markup=InlineKeyboardMarkup(rows))
@@ -12,19 +12,27 @@ TELEGRAM_TOKEN = os.getenv("BOTTOKEN")
 if not TELEGRAM_TOKEN:
     raise ValueError("BOTTOKEN env var not set")
 
-ADMIN_IDS = [int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()]
+ADMIN_IDS: frozenset = frozenset(int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip())
 
 # UI pagination
 POSTS_PER_PAGE = 5
 PAGE_SIZE_USERS = 10
 LEADERBOARD_LIMIT = 10
 
+# User-typed platform names → internal platform codes
+PLATFORM_ALIASES = {
+    "x": "x", "twitter": "x",
+    "ig": "ig", "instagram": "ig",
+    "fb": "fb", "facebook": "fb",
+    "yt": "yt", "youtube": "yt",
+}
+
 # Global test mode (force-send posts even if seen)
 TEST_MODE = {"enabled": False}
 
 def is_admin(user_id: Optional[int]) -> bool:
     """Check if a user ID belongs to an admin."""
-    return bool(user_id and user_id in ADMIN_IDS)
+    return user_id is not None and user_id in ADMIN_IDS
 
 def admin_only(handler_func):
     """Decorator for async handlers — blocks non‑admins early and sends an error."""
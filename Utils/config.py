@@ -3,6 +3,8 @@ import os
 # ================ CONFIG ================
 DB_URL = os.getenv("DATABASE_URL")                       # main cache DB (social posts)
 TG_DB_URL = os.getenv("USERS_DATABASE_URL") or os.getenv("TG_DB_URL")   # separate TG DB
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))        # pooled connections kept per database
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free pooled connection
 CACHE_HOURS = 24
 POST_LIMIT = 10
 GROQ_API_KEY = os.getenv("GROQ_KEY")
@@ -19,12 +21,12 @@ TWEETS_URL = "https://twitter-x-api.p.rapidapi.com/api/user/tweets"
 
 # Admin IDs from environment (comma-separated)
 ADMIN_IDS_ENV = os.getenv("ADMIN_IDS", "")
-ADMIN_IDS = []
+ADMIN_IDS = frozenset()
 if ADMIN_IDS_ENV:
     try:
-        ADMIN_IDS = [int(x.strip()) for x in ADMIN_IDS_ENV.split(",") if x.strip()]
+        ADMIN_IDS = frozenset(int(x.strip()) for x in ADMIN_IDS_ENV.split(",") if x.strip())
     except Exception:
-        ADMIN_IDS = []
+        ADMIN_IDS = frozenset()
 
 # Badge levels definition
 BADGE_LEVELS = [
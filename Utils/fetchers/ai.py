@@ -1,8 +1,6 @@
 import logging
 from typing import Dict, Optional, Any, Tuple, Callable, List
 
-from openai import AsyncOpenAI
-
 from Utils import config
 
 async def call_social_ai(platform: str, account: str, posts: List[Dict]) -> str:
@@ -41,6 +39,7 @@ Answer in short, sweet Pidgin-mixed English with Naija slang. Keep am punchy –
     ]
 
     try:
+        from openai import AsyncOpenAI
         client = AsyncOpenAI(
             api_key=api_key,
             base_url="https://api.groq.com/openai/v1"
@@ -8,6 +8,9 @@ import requests
 from Utils import config
 from Utils import persistence
 
+# Shared session keeps the RapidAPI TLS connection alive between fetches
+_session = requests.Session()
+
 def rapidapi_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: int = 20, retries: int = 2) -> Dict[str, Any]:
     if not config.RAPIDAPI_KEY:
         raise RuntimeError("RAPIDAPI_KEY not set in environment")
@@ -23,7 +26,7 @@ def rapidapi_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: in
     last_exc = None
     for attempt in range(retries + 1):
         try:
-            resp = requests.get(url, headers=headers, params=params or {}, timeout=timeout)
+            resp = _session.get(url, headers=headers, params=params or {}, timeout=timeout)
             if resp.status_code != 200:
                 logging.warning(
                     "rapidapi_get non-200 status %s for %s (attempt %d). Body: %.500s",
@@ -544,7 +544,7 @@ class InstagramCaptionScraper2026:
                 if await locator.is_visible(timeout=500):
                     await locator.click(force=True, timeout=1000)
                     await asyncio.sleep(0.2)
-            except:
+            except PlaywrightError:
                 pass
     
     async def _capture_html_fast(self, page: Page) -> bytes:
@@ -603,7 +603,7 @@ class InstagramCaptionScraper2026:
             # Reels: Meta tags in initial HTML, minimal wait
             try:
                 await page.wait_for_selector("body", timeout=DOM_WAIT_REEL)
-            except:
+            except PlaywrightError:
                 pass
             await asyncio.sleep(0.3)  # Tiny buffer for JS
             
@@ -614,7 +614,7 @@ class InstagramCaptionScraper2026:
                 try:
                     await page.wait_for_selector(sel, timeout=DOM_WAIT_POST // len(selectors))
                     return
-                except:
+                except PlaywrightError:
                     continue
             await asyncio.sleep(0.5)
     
@@ -1227,7 +1227,7 @@ class InstagramCaptionScraper2026:
                     for page in pages:
                         try:
                             await asyncio.wait_for(page.close(), timeout=3.0)
-                        except:
+                        except (PlaywrightError, asyncio.TimeoutError):
                             pass  # Ignore individual page close errors
                     
                     await asyncio.wait_for(context.close(), timeout=5.0)
@@ -6,7 +6,12 @@ from typing import Dict, Optional, Any, Tuple, Callable, List
 import requests
 
 from Utils import config
-from Utils import persistence
+
+# Post links are emitted in fixupx form so senders never rewrite them
+TWITTER_FIXER_DOMAIN = "fixupx.com"
+
+# Shared session keeps the RapidAPI TLS connection alive between fetches
+_session = requests.Session()
 
 def _normalize_account_input(account: str) -> str:
     if not account:
@@ -78,7 +83,7 @@ def fetch_x_urls(account: str, limit: int = 10, max_retries: int = 3) -> List[st
     while attempt <= max_retries:
         try:
             attempt += 1
-            resp = requests.get(config.TWEETS_URL, headers=headers, params=params, timeout=30)
+            resp = _session.get(config.TWEETS_URL, headers=headers, params=params, timeout=30)
             resp.raise_for_status()
             data = resp.json()
             tweets = data.get("data", []) or data.get("statuses", []) or data.get("results", []) or []
@@ -90,12 +95,7 @@ def fetch_x_urls(account: str, limit: int = 10, max_retries: int = 3) -> List[st
                 if not tid:
                     continue
                 display_account = user_id
-                TWITTER_FIXER_DOMAIN = "fixupx.com"
                 urls.append(f"https://{TWITTER_FIXER_DOMAIN}/{display_account}/status/{tid}")
-                try:
-                    persistence.save_url("x", display_account, urls[-1])
-                except Exception:
-                    logging.debug("save_url failed for %s", urls[-1], exc_info=True)
                 if len(urls) >= limit:
                     break
             logging.info("Fetched %d posts for %s (user_id=%s, attempt=%d).", len(urls), account_raw, user_id, attempt)
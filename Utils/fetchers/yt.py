@@ -1,10 +1,19 @@
 import logging
+import threading
 from typing import Dict, Optional, Any, Tuple, Callable, List
 
-from googleapiclient.discovery import build
-
 from Utils import config
 
+# httplib2 isn't thread-safe, so each fetch-pool thread keeps its own built client
+_yt_local = threading.local()
+
+def _youtube_client():
+    client = getattr(_yt_local, "client", None)
+    if client is None:
+        from googleapiclient.discovery import build
+        client = _yt_local.client = build('youtube', 'v3', developerKey=config.YOUTUBE_API_KEY)
+    return client
+
 def fetch_yt_videos(channel_handle: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
     if max_results is None:
         max_results = config.POST_LIMIT
@@ -13,7 +22,7 @@ def fetch_yt_videos(channel_handle: str, max_results: Optional[int] = None) -> L
         logging.warning("YOUTUBE_API_KEY not set")
         return []
 
-    youtube = build('youtube', 'v3', developerKey=config.YOUTUBE_API_KEY)
+    youtube = _youtube_client()
     videos: List[Dict[str, Any]] = []
 
     try:
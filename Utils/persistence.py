@@ -1,24 +1,82 @@
 import os
+import time
 import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import re
+import threading
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from psycopg2.extras import RealDictCursor, execute_values
 
 from Utils import config # for DB URLs
 
 # ================ DB CONNECTIONS ============
+class PooledConnection:
+    """Connection borrowed from a pool; close() hands it back instead of disconnecting.
+
+    Everything else is delegated to the real connection, so callers keep the
+    usual `conn = get_tg_db(); ...; conn.close()` shape. Callers must close in a
+    `finally` — a connection that is never closed keeps its pool slot.
+    """
+    _pool = None
+    _conn = None
+    _slots = None
+
+    def __init__(self, pool: ThreadedConnectionPool, conn, slots: threading.BoundedSemaphore):
+        self._pool = pool
+        self._conn = conn
+        self._slots = slots
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()  # drop any transaction a read left open
+                except Exception:
+                    broken = True
+            self._pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+# dsn -> (pool, slots); slots caps checkouts at DB_POOL_MAX so getconn never runs dry
+_pools: Dict[str, Tuple[ThreadedConnectionPool, threading.BoundedSemaphore]] = {}
+_pools_lock = threading.Lock()
+
+def _pooled_connect(dsn: str):
+    entry = _pools.get(dsn)
+    if entry is None:
+        with _pools_lock:
+            entry = _pools.get(dsn)
+            if entry is None:
+                pool = ThreadedConnectionPool(1, config.DB_POOL_MAX, dsn, cursor_factory=RealDictCursor)
+                entry = _pools[dsn] = (pool, threading.BoundedSemaphore(config.DB_POOL_MAX))
+    pool, slots = entry
+    # Pool exhausted: wait for a connection to come back rather than opening extra ones
+    if not slots.acquire(timeout=config.DB_POOL_TIMEOUT):
+        raise PoolError(f"no free DB connection within {config.DB_POOL_TIMEOUT}s")
+    try:
+        return PooledConnection(pool, pool.getconn(), slots)
+    except Exception:
+        slots.release()
+        raise
+
 def get_db():
     if not config.DB_URL:
         raise RuntimeError("DATABASE_URL not set")
-    return psycopg2.connect(config.DB_URL, cursor_factory=RealDictCursor)
+    return _pooled_connect(config.DB_URL)
 
 def get_tg_db():
     if not config.TG_DB_URL:
         raise RuntimeError("USERS_DATABASE_URL / TG_DB_URL not set")
-    return psycopg2.connect(config.TG_DB_URL, cursor_factory=RealDictCursor)
+    return _pooled_connect(config.TG_DB_URL)
 
 # ================ INIT TABLES ================
 def init_tg_db():
@@ -121,19 +179,26 @@ def init_tg_db():
         # social_posts in main DB only if DB_URL is set
         if config.DB_URL:
             db_conn = get_db()
-            db_cur = db_conn.cursor()
-            db_cur.execute("""
-            CREATE TABLE IF NOT EXISTS social_posts (
-                id TEXT PRIMARY KEY,
-                platform TEXT NOT NULL,
-                account_name TEXT NOT NULL,
-                post_url TEXT NOT NULL,
-                fetched_at TIMESTAMP NOT NULL
-            );
-            """)
-            db_conn.commit()
-            db_cur.close()
-            db_conn.close()
+            try:
+                db_cur = db_conn.cursor()
+                db_cur.execute("""
+                CREATE TABLE IF NOT EXISTS social_posts (
+                    id TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    account_name TEXT NOT NULL,
+                    post_url TEXT NOT NULL,
+                    fetched_at TIMESTAMP NOT NULL
+                );
+                """)
+                # Covers get_recent_urls: equality on account/platform, newest first, post_url from the index
+                db_cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_social_posts_recent
+                ON social_posts(account_name, platform, fetched_at DESC) INCLUDE (post_url);
+                """)
+                db_conn.commit()
+                db_cur.close()
+            finally:
+                db_conn.close()
 
         # Add FK constraint if not present
         cur.execute("""
@@ -154,24 +219,31 @@ def init_tg_db():
 
         conn.commit()
         cur.close()
-        conn.close()
         logging.info("[persistence.init_tg_db] tg DB tables created/verified successfully.")
     except Exception:
         logging.exception("[persistence.init_tg_db] Failed to initialize tg DB tables")
-        try:
-            if conn:
-                conn.close()
-        except Exception:
-            pass
+    finally:
+        if conn is not None:
+            conn.close()
 
 # ================ CACHE HELPERS ============
+# (platform, account) -> (expires_at, urls); dropped whenever that account's URLs are saved
+RECENT_URLS_CACHE_TTL = 60
+RECENT_URLS_CACHE_MAX = 10_000
+_RECENT_URLS_CACHE: Dict[tuple, tuple] = {}
+
+def invalidate_recent_urls(platform: str, account: str) -> None:
+    _RECENT_URLS_CACHE.pop((platform.lower(), account.lower()), None)
+
 def generate_url_hash(account: str, url: str) -> str:
     key = f"{account.lower()}:{url}"
-    return hashlib.sha256(key.encode()).hexdigest()
+    # 32-hex-char key: half the index size of sha256, and faster on short strings
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
 def save_url(platform: str, account: str, url: str):
     if not config.DB_URL:
         return
+    conn = None
     try:
         conn = get_db()
         cur = conn.cursor()
@@ -184,34 +256,75 @@ def save_url(platform: str, account: str, url: str):
         """, (post_id, platform.lower(), account.lower(), url))
         conn.commit()
         cur.close()
-        conn.close()
+        invalidate_recent_urls(platform, account)
     except Exception:
         logging.debug("save_url failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+
+def save_urls(platform: str, account: str, urls: List[str]) -> None:
+    """Upsert many post URLs for one account in a single statement."""
+    if not config.DB_URL or not urls:
+        return
+    platform = platform.lower()
+    account_l = account.lower()
+    # Dedupe on id: ON CONFLICT can't touch the same row twice in one INSERT
+    rows = list({h: (h, platform, account_l, u) for u in urls for h in (generate_url_hash(account, u),)}.values())
+    conn = None
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        execute_values(cur, """
+            INSERT INTO social_posts (id, platform, account_name, post_url, fetched_at)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE
+            SET fetched_at = NOW()
+        """, rows, template="(%s, %s, %s, %s, NOW())")
+        conn.commit()
+        cur.close()
+        invalidate_recent_urls(platform, account)
+    except Exception:
+        logging.debug("save_urls failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
 
 def get_recent_urls(platform: str, account: str) -> list:
     if not config.DB_URL:
         return []
+    key = (platform.lower(), account.lower())
+    hit = _RECENT_URLS_CACHE.get(key)
+    if hit and hit[0] > time.monotonic():
+        return list(hit[1])
     conn = get_db()
-    cur = conn.cursor()
-    time_limit = datetime.utcnow() - timedelta(hours=config.CACHE_HOURS)
     try:
+        cur = conn.cursor()
         cur.execute("""
             SELECT post_url
             FROM social_posts
             WHERE platform = %s
               AND account_name = %s
-              AND fetched_at >= %s
+              AND fetched_at >= NOW() - make_interval(hours => %s)
             ORDER BY fetched_at DESC
             LIMIT %s
-        """, (platform.lower(), account.lower(), time_limit, config.POST_LIMIT))
+        """, (*key, config.CACHE_HOURS, config.POST_LIMIT))
         rows = cur.fetchall()
-        return [row["post_url"] for row in rows]
-    finally:
+        # Rows hashed under the old sha256 ids may duplicate a URL until they age out
+        urls = tuple(dict.fromkeys(row["post_url"] for row in rows))
         cur.close()
+    finally:
         conn.close()
+    _RECENT_URLS_CACHE.pop(key, None)
+    if len(_RECENT_URLS_CACHE) >= RECENT_URLS_CACHE_MAX:
+        _RECENT_URLS_CACHE.pop(next(iter(_RECENT_URLS_CACHE)), None)
+    # Cached as a tuple and handed out as a fresh list, so callers can't mutate the shared entry
+    _RECENT_URLS_CACHE[key] = (time.monotonic() + RECENT_URLS_CACHE_TTL, urls)
+    return list(urls)
 
 # ================ TG USER HELPERS ============
 def add_or_update_tg_user(telegram_id: int, first_name: str) -> Dict[str, Any]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -236,18 +349,16 @@ def add_or_update_tg_user(telegram_id: int, first_name: str) -> Dict[str, Any]:
         """, (telegram_id,))
         row = cur.fetchone()
         cur.close()
-        conn.close()
         return dict(row) if row else {}
     except Exception:
         logging.exception("add_or_update_tg_user failed")
-        try:
-            if conn:
-                conn.close()
-        except Exception:
-            pass
         return {}
+    finally:
+        if conn is not None:
+            conn.close()
 
 def create_user_if_missing(telegram_id: int, first_name: str) -> bool:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -260,52 +371,76 @@ def create_user_if_missing(telegram_id: int, first_name: str) -> bool:
         r = cur.fetchone()
         conn.commit()
         cur.close()
-        conn.close()
         return bool(r)
     except Exception:
         logging.debug("create_user_if_missing failed", exc_info=True)
-        try:
-            cur.close()
-            conn.close()
-        except Exception:
-            pass
         return False
+    finally:
+        if conn is not None:
+            conn.close()
 
 def ban_tg_user(telegram_id: int) -> None:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("UPDATE tg_users SET is_banned = 1 WHERE telegram_id = %s", (telegram_id,))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("ban_tg_user failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
 
 def unban_tg_user(telegram_id: int) -> None:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("UPDATE tg_users SET is_banned = 0 WHERE telegram_id = %s", (telegram_id,))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("unban_tg_user failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
 
 def set_tg_user_active(telegram_id: int, active: bool) -> None:
     val = 1 if active else 0
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("UPDATE tg_users SET is_active = %s WHERE telegram_id = %s", (val, telegram_id))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("set_tg_user_active failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+
+def deactivate_tg_users(telegram_ids: List[int]) -> None:
+    """Mark many users inactive in one statement (e.g. those who blocked the bot)."""
+    if not telegram_ids:
+        return
+    conn = None
+    try:
+        conn = get_tg_db()
+        cur = conn.cursor()
+        cur.execute("UPDATE tg_users SET is_active = 0 WHERE telegram_id = ANY(%s)", (list(telegram_ids),))
+        conn.commit()
+        cur.close()
+    except Exception:
+        logging.debug("deactivate_tg_users failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
 
 def increment_tg_request_count(telegram_id: int) -> None:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -323,24 +458,67 @@ def increment_tg_request_count(telegram_id: int) -> None:
             """, (telegram_id,))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("increment_tg_request_count failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+
+def bulk_upsert_tg_users(users: Dict[int, str]) -> None:
+    """Upsert many telegram_id -> first_name pairs in one statement. Raises on DB errors."""
+    if not users:
+        return
+    conn = get_tg_db()
+    try:
+        cur = conn.cursor()
+        execute_values(cur, """
+            INSERT INTO tg_users (telegram_id, first_name)
+            VALUES %s
+            ON CONFLICT (telegram_id)
+            DO UPDATE SET first_name = EXCLUDED.first_name
+        """, list(users.items()))
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+def bulk_increment_tg_requests(counts: Dict[int, int]) -> None:
+    """Add per-user request counts (telegram_id -> n) in one statement. Raises on DB errors."""
+    if not counts:
+        return
+    conn = get_tg_db()
+    try:
+        cur = conn.cursor()
+        execute_values(cur, """
+            INSERT INTO tg_users (telegram_id, request_count, last_request_at)
+            VALUES %s
+            ON CONFLICT (telegram_id)
+            DO UPDATE SET request_count = COALESCE(tg_users.request_count, 0) + EXCLUDED.request_count,
+                          last_request_at = EXCLUDED.last_request_at
+        """, list(counts.items()), template="(%s, %s, NOW())")
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
 
 def get_tg_user(telegram_id: int) -> Optional[Dict[str, Any]]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("SELECT * FROM tg_users WHERE telegram_id = %s", (telegram_id,))
         row = cur.fetchone()
         cur.close()
-        conn.close()
         return dict(row) if row else None
     except Exception:
         logging.debug("get_tg_user failed", exc_info=True)
         return None
+    finally:
+        if conn is not None:
+            conn.close()
 
 def list_active_tg_users(limit: int = 100) -> List[Dict[str, Any]]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -353,13 +531,16 @@ def list_active_tg_users(limit: int = 100) -> List[Dict[str, Any]]:
         """, (limit,))
         rows = cur.fetchall()
         cur.close()
-        conn.close()
         return [dict(r) for r in rows]
     except Exception:
         logging.debug("list_active_tg_users failed", exc_info=True)
         return []
+    finally:
+        if conn is not None:
+            conn.close()
 
 def list_all_tg_users(limit: int = 1000) -> List[Dict[str, Any]]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -371,16 +552,100 @@ def list_all_tg_users(limit: int = 1000) -> List[Dict[str, Any]]:
         """, (limit,))
         rows = cur.fetchall()
         cur.close()
-        conn.close()
         return [dict(r) for r in rows]
     except Exception:
         logging.debug("list_all_tg_users failed", exc_info=True)
         return []
+    finally:
+        if conn is not None:
+            conn.close()
+
+def list_tg_users_page(offset: int, limit: int) -> List[Dict[str, Any]]:
+    conn = None
+    try:
+        conn = get_tg_db()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT telegram_id, first_name, is_active, is_banned, request_count, last_request_at, joined_at, invite_count
+            FROM tg_users
+            ORDER BY joined_at DESC
+            LIMIT %s OFFSET %s
+        """, (limit, offset))
+        rows = cur.fetchall()
+        cur.close()
+        return [dict(r) for r in rows]
+    except Exception:
+        logging.debug("list_tg_users_page failed", exc_info=True)
+        return []
+    finally:
+        if conn is not None:
+            conn.close()
+
+def iter_all_tg_users(chunk: int = 1000):
+    """Yield every tg_users row through a server-side cursor, `chunk` rows per round-trip.
+
+    Errors propagate so a caller never mistakes a cut-short stream for the full table.
+    """
+    conn = get_tg_db()
+    cur = None
+    try:
+        cur = conn.cursor("tg_users_export")
+        cur.itersize = chunk
+        cur.execute("""
+            SELECT telegram_id, first_name, is_active, is_banned, request_count, last_request_at, joined_at, invite_count
+            FROM tg_users
+            ORDER BY joined_at DESC
+        """)
+        for r in cur:
+            yield dict(r)
+    except Exception:
+        logging.error("iter_all_tg_users failed mid-stream", exc_info=True)
+        raise
+    finally:
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        conn.close()
+
+# Total user count for the admin list header; approximate by up to TG_USER_COUNT_TTL seconds
+TG_USER_COUNT_TTL = 30
+_TG_USER_COUNT_CACHE: Dict[str, float] = {"expires_at": 0.0, "count": 0}
+
+def count_tg_users() -> int:
+    if _TG_USER_COUNT_CACHE["expires_at"] > time.monotonic():
+        return int(_TG_USER_COUNT_CACHE["count"])
+    conn = None
+    try:
+        conn = get_tg_db()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(1) AS cnt FROM tg_users")
+        r = cur.fetchone()
+        cur.close()
+        cnt = int(r["cnt"]) if r else 0
+        _TG_USER_COUNT_CACHE["count"] = cnt
+        _TG_USER_COUNT_CACHE["expires_at"] = time.monotonic() + TG_USER_COUNT_TTL
+        return cnt
+    except Exception:
+        logging.debug("count_tg_users failed", exc_info=True)
+        return 0
+    finally:
+        if conn is not None:
+            conn.close()
 
 # ================ SAVED ACCOUNTS HELPERS ============
+# owner_telegram_id -> (expires_at, rows); dropped on any mutation
+SAVED_CACHE_TTL = 30
+_SAVED_CACHE: Dict[int, tuple] = {}
+
+def invalidate_saved_cache(owner_telegram_id: int) -> None:
+    _SAVED_CACHE.pop(owner_telegram_id, None)
+
 def save_user_account(owner_telegram_id: int, platform: str, account_name: str, label: Optional[str]=None) -> Dict[str, Any]:
     platform = platform.lower()
     account_name = account_name.lstrip('@')
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -394,13 +659,20 @@ def save_user_account(owner_telegram_id: int, platform: str, account_name: str,
         row = cur.fetchone()
         conn.commit()
         cur.close()
-        conn.close()
+        invalidate_saved_cache(owner_telegram_id)
         return dict(row) if row else {}
     except Exception:
         logging.debug("save_user_account failed", exc_info=True)
         return {}
+    finally:
+        if conn is not None:
+            conn.close()
 
 def list_saved_accounts(owner_telegram_id: int) -> List[Dict[str, Any]]:
+    hit = _SAVED_CACHE.get(owner_telegram_id)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -410,15 +682,19 @@ def list_saved_accounts(owner_telegram_id: int) -> List[Dict[str, Any]]:
             WHERE owner_telegram_id = %s
             ORDER BY created_at DESC
         """, (owner_telegram_id,))
-        rows = cur.fetchall()
+        rows = [dict(r) for r in cur.fetchall()]
         cur.close()
-        conn.close()
-        return [dict(r) for r in rows]
+        _SAVED_CACHE[owner_telegram_id] = (time.monotonic() + SAVED_CACHE_TTL, rows)
+        return rows
     except Exception:
         logging.debug("list_saved_accounts failed", exc_info=True)
         return []
+    finally:
+        if conn is not None:
+            conn.close()
 
 def get_saved_account(owner_telegram_id: int, saved_id: int) -> Optional[Dict[str, Any]]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -429,13 +705,16 @@ def get_saved_account(owner_telegram_id: int, saved_id: int) -> Optional[Dict[st
         """, (owner_telegram_id, saved_id))
         row = cur.fetchone()
         cur.close()
-        conn.close()
         return dict(row) if row else None
     except Exception:
         logging.debug("get_saved_account failed", exc_info=True)
         return None
+    finally:
+        if conn is not None:
+            conn.close()
 
 def remove_saved_account(owner_telegram_id: int, saved_id: int) -> bool:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -446,26 +725,22 @@ def remove_saved_account(owner_telegram_id: int, saved_id: int) -> bool:
         deleted = cur.rowcount
         conn.commit()
         cur.close()
-        conn.close()
+        if deleted:
+            invalidate_saved_cache(owner_telegram_id)
         return deleted > 0
     except Exception:
         logging.debug("remove_saved_account failed", exc_info=True)
         return False
+    finally:
+        if conn is not None:
+            conn.close()
 
 def count_saved_accounts(owner_telegram_id: int) -> int:
-    try:
-        conn = get_tg_db()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(1) as cnt FROM saved_accounts WHERE owner_telegram_id = %s", (owner_telegram_id,))
-        r = cur.fetchone()
-        cur.close()
-        conn.close()
-        return int(r["cnt"]) if r else 0
-    except Exception:
-        logging.debug("count_saved_accounts failed", exc_info=True)
-        return 0
+    # Served from the saved-list cache; a save check followed by a list render costs one query
+    return len(list_saved_accounts(owner_telegram_id))
 
 def update_saved_account_label(owner_telegram_id: int, saved_id: int, new_label: str) -> bool:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -477,27 +752,57 @@ def update_saved_account_label(owner_telegram_id: int, saved_id: int, new_label:
         ok = cur.rowcount
         conn.commit()
         cur.close()
-        conn.close()
+        if ok:
+            invalidate_saved_cache(owner_telegram_id)
         return ok > 0
     except Exception:
         logging.debug("update_saved_account_label failed", exc_info=True)
         return False
+    finally:
+        if conn is not None:
+            conn.close()
 
 # ================ BADGE HELPERS (DB only) ================
+# telegram_id -> (expires_at, badge) for utils.get_user_badge. Kept here so the writers
+# below can drop an entry the moment invite_count or is_admin changes; bounded like
+# the ban cache, oldest entry evicted first
+BADGE_CACHE_TTL = 300
+BADGE_CACHE_MAX = 50_000
+_badge_cache: Dict[int, tuple] = {}
+
+def get_cached_badge(telegram_id: int) -> Optional[Dict[str, Any]]:
+    hit = _badge_cache.get(telegram_id)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+def set_cached_badge(telegram_id: int, badge: Dict[str, Any]) -> None:
+    _badge_cache.pop(telegram_id, None)
+    if len(_badge_cache) >= BADGE_CACHE_MAX:
+        _badge_cache.pop(next(iter(_badge_cache)), None)
+    _badge_cache[telegram_id] = (time.monotonic() + BADGE_CACHE_TTL, badge)
+
+def invalidate_badge_cache(telegram_id: int) -> None:
+    _badge_cache.pop(telegram_id, None)
+
 def get_explicit_badge(telegram_id: int) -> Optional[str]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("SELECT badge FROM tg_badges WHERE telegram_id = %s", (telegram_id,))
         row = cur.fetchone()
         cur.close()
-        conn.close()
         return row['badge'] if row else None
     except Exception:
         logging.debug("get_explicit_badge failed", exc_info=True)
         return None
+    finally:
+        if conn is not None:
+            conn.close()
 
 def increment_invite_count(telegram_id: int, amount: int = 1) -> int:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -521,37 +826,50 @@ def increment_invite_count(telegram_id: int, amount: int = 1) -> int:
             new_count = cur.fetchone()['invite_count']
         conn.commit()
         cur.close()
-        conn.close()
+        invalidate_badge_cache(telegram_id)
         return int(new_count)
     except Exception:
         logging.debug("increment_invite_count failed", exc_info=True)
         return 0
+    finally:
+        if conn is not None:
+            conn.close()
 
 def set_admin(telegram_id: int, is_admin: bool) -> None:
     val = 1 if is_admin else 0
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("UPDATE tg_users SET is_admin = %s WHERE telegram_id = %s", (val, telegram_id))
         conn.commit()
         cur.close()
-        conn.close()
+        invalidate_badge_cache(telegram_id)
     except Exception:
         logging.debug("set_admin failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
 
 # ================ COOLDOWN HELPERS ================
 def get_rate_limits(telegram_id: int) -> Dict[str, Any]:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
         cur.execute("SELECT * FROM tg_rate_limits WHERE telegram_id = %s", (telegram_id,))
         row = cur.fetchone()
         cur.close()
-        conn.close()
         if row:
             return dict(row)
     except Exception:
         logging.debug("get_rate_limits failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+    return default_rate_limits(telegram_id)
+
+def default_rate_limits(telegram_id: int) -> Dict[str, Any]:
     return {
         'telegram_id': telegram_id,
         'minute_count': 0,
@@ -562,7 +880,50 @@ def get_rate_limits(telegram_id: int) -> Dict[str, Any]:
         'day_reset': None
     }
 
+# tg_rate_limits columns, selected through get_user_stats_row's LEFT JOIN as _rl_<col>
+_RATE_LIMIT_COLS = ("telegram_id", "minute_count", "hour_count", "day_count", "minute_reset", "hour_reset", "day_reset")
+
+def get_user_stats_row(telegram_id: int) -> Optional[Dict[str, Any]]:
+    """User row plus its rate-limit row and saved-account count, in one round-trip.
+
+    The rate-limit row comes back under "_rate_limits" (None if the user has none),
+    with the same types get_rate_limits returns.
+    """
+    conn = None
+    try:
+        conn = get_tg_db()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT u.*,
+                   rl.telegram_id AS _rl_telegram_id,
+                   rl.minute_count AS _rl_minute_count,
+                   rl.hour_count AS _rl_hour_count,
+                   rl.day_count AS _rl_day_count,
+                   rl.minute_reset AS _rl_minute_reset,
+                   rl.hour_reset AS _rl_hour_reset,
+                   rl.day_reset AS _rl_day_reset,
+                   (SELECT COUNT(1) FROM saved_accounts s WHERE s.owner_telegram_id = u.telegram_id) AS _save_count
+            FROM tg_users u
+            LEFT JOIN tg_rate_limits rl ON rl.telegram_id = u.telegram_id
+            WHERE u.telegram_id = %s
+        """, (telegram_id,))
+        row = cur.fetchone()
+        cur.close()
+        if not row:
+            return None
+        row = dict(row)
+        rl = {c: row.pop(f"_rl_{c}") for c in _RATE_LIMIT_COLS}
+        row["_rate_limits"] = rl if rl["telegram_id"] is not None else None
+        return row
+    except Exception:
+        logging.debug("get_user_stats_row failed", exc_info=True)
+        return None
+    finally:
+        if conn is not None:
+            conn.close()
+
 def update_rate_limits(telegram_id: int, data: Dict[str, Any]) -> None:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -580,11 +941,37 @@ def update_rate_limits(telegram_id: int, data: Dict[str, Any]) -> None:
               data['minute_reset'], data['hour_reset'], data['day_reset']))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("update_rate_limits failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+
+# telegram_id -> (blocked_until, badge, period, limit) for users currently over a limit;
+# lets repeat requests be refused without touching the DB until the window resets.
+# Bounded like the ban cache: past COOLDOWN_BLOCKS_MAX the oldest block is evicted
+# (losing one only costs that user a DB check)
+COOLDOWN_BLOCKS_MAX = 50_000
+_cooldown_blocks: Dict[int, tuple] = {}
+
+def get_cooldown_block(telegram_id: int) -> Optional[tuple]:
+    return _cooldown_blocks.get(telegram_id)
+
+def set_cooldown_block(telegram_id: int, block: tuple) -> None:
+    _cooldown_blocks.pop(telegram_id, None)
+    if len(_cooldown_blocks) >= COOLDOWN_BLOCKS_MAX:
+        _cooldown_blocks.pop(next(iter(_cooldown_blocks)), None)
+    _cooldown_blocks[telegram_id] = block
+
+def clear_cooldown_blocks(telegram_id: Optional[int] = None) -> None:
+    if telegram_id is None:
+        _cooldown_blocks.clear()
+    else:
+        _cooldown_blocks.pop(telegram_id, None)
 
 def reset_cooldown(telegram_id: int) -> None:
+    clear_cooldown_blocks(telegram_id)
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -596,9 +983,29 @@ def reset_cooldown(telegram_id: int) -> None:
         """, (telegram_id,))
         conn.commit()
         cur.close()
-        conn.close()
     except Exception:
         logging.debug("reset_cooldown failed", exc_info=True)
+    finally:
+        if conn is not None:
+            conn.close()
+
+def reset_all_cooldowns() -> int:
+    """Zero every user's rate-limit counters; returns the number of rows reset. Raises on DB errors."""
+    clear_cooldown_blocks()
+    conn = get_tg_db()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE tg_rate_limits SET
+                minute_count = 0, hour_count = 0, day_count = 0,
+                minute_reset = NULL, hour_reset = NULL, day_reset = NULL
+        """)
+        affected = cur.rowcount
+        conn.commit()
+        cur.close()
+        return affected
+    finally:
+        conn.close()
 
 # ================ POST DEDUP HELPERS ================
 def extract_post_id(platform: str, url: str) -> str:
@@ -629,6 +1036,7 @@ def extract_post_id(platform: str, url: str) -> str:
     return ""
 
 def is_post_new(owner_id: int, platform: str, account: str, post_id: str) -> bool:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -641,13 +1049,16 @@ def is_post_new(owner_id: int, platform: str, account: str, post_id: str) -> boo
         """, (owner_id, platform, account, post_id))
         exists = cur.fetchone()
         cur.close()
-        conn.close()
         return exists is None
     except Exception:
         logging.debug("is_post_new failed", exc_info=True)
         return True
+    finally:
+        if conn is not None:
+            conn.close()
 
 def ensure_platform_exists(platform: str) -> bool:
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -658,11 +1069,13 @@ def ensure_platform_exists(platform: str) -> bool:
         """, (platform,))
         conn.commit()
         cur.close()
-        conn.close()
         return True
     except Exception:
         logging.debug("ensure_platform_exists failed for '%s'", platform, exc_info=True)
         return False
+    finally:
+        if conn is not None:
+            conn.close()
 
 def mark_posts_seen(owner_id: int, platform: str, account: str, posts: List[Dict[str, str]]):
     if not posts:
@@ -675,6 +1088,7 @@ def mark_posts_seen(owner_id: int, platform: str, account: str, posts: List[Dict
         logging.warning(f"Skipping mark_posts_seen due to platform '{platform}' insert failure")
         return
 
+    conn = None
     try:
         conn = get_tg_db()
         cur = conn.cursor()
@@ -686,7 +1100,8 @@ def mark_posts_seen(owner_id: int, platform: str, account: str, posts: List[Dict
         ]
 
         if values:
-            cur.executemany("""
+            # One multi-row INSERT; executemany would be a round trip per post
+            execute_values(cur, """
                 INSERT INTO seen_posts (
                     owner_telegram_id, 
                     platform, 
@@ -694,7 +1109,7 @@ def mark_posts_seen(owner_id: int, platform: str, account: str, posts: List[Dict
                     post_id, 
                     post_url
                 )
-                VALUES (%s, %s, %s, %s, %s)
+                VALUES %s
                 ON CONFLICT (owner_telegram_id, platform, account_name, post_id) 
                 DO NOTHING
             """, values)
@@ -710,11 +1125,8 @@ def mark_posts_seen(owner_id: int, platform: str, account: str, posts: List[Dict
     except Exception as e:
         logging.error("Failed to mark posts seen: %s", e, exc_info=True)
     finally:
-        try:
-            cur.close()
+        if conn is not None:
             conn.close()
-        except Exception:
-            pass
 
 # ================ INIT ON IMPORT ================
 try:
@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 
 from .config import *
@@ -22,33 +23,42 @@ def fetch_latest_urls(platform: str, account: str) -> List[str]:
         return cached
     if platform == "x":
         new = fetch_x_urls(account)
-        for u in new:
-            persistence.save_url("x", account, u)
+        persistence.save_urls("x", account, new)
         return new
     elif platform == "ig":
         new_ig = fetch_ig_urls(account)
-        for p in new_ig:
-            persistence.save_url("ig", account, p["url"])
-        return [p["url"] for p in new_ig]
+        urls = [p["url"] for p in new_ig]
+        persistence.save_urls("ig", account, urls)
+        return urls
     elif platform == "fb":
         new_fb = fetch_fb_urls(account)
-        for p in new_fb:
-            persistence.save_url("fb", account, p["post_url"])
-        return [p["post_url"] for p in new_fb]
+        urls = [p["post_url"] for p in new_fb]
+        persistence.save_urls("fb", account, urls)
+        return urls
     return []
 
 # ================ BADGE AND COOLDOWN LOGIC ================
 def get_user_badge(telegram_id: int) -> Dict[str, Any]:
-    user = persistence.get_tg_user(telegram_id)
-
+    """Badge for telegram_id, served from persistence's badge cache when fresh."""
+    badge = persistence.get_cached_badge(telegram_id)
+    if badge is None:
+        badge = badge_for_user(telegram_id, persistence.get_tg_user(telegram_id))
+        persistence.set_cached_badge(telegram_id, badge)
+    return badge
+
+def badge_for_user(telegram_id: int, user: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Badge for an already-loaded tg_users row (None if the user has no row)."""
     if (user and int(user.get("is_admin", 0)) == 1) or (telegram_id in config.ADMIN_IDS):
         for b in config.BADGE_LEVELS:
             if b.get("name") == "Admin":
                 return b
         return config.BADGE_LEVELS[-1]
 
-    invites = user.get("invite_count", 0) if user else 0
+    invites = int(user.get("invite_count", 0) or 0) if user else 0
+    return _badge_for_invites(invites)
 
+@lru_cache(maxsize=None)
+def _badge_for_invites(invites: int) -> Dict[str, Any]:
     non_admin_levels = [lvl for lvl in config.BADGE_LEVELS if lvl.get("name") != "Admin"]
     for level in reversed(non_admin_levels):
         needed = level.get("invites_needed") or 0
@@ -57,17 +67,32 @@ def get_user_badge(telegram_id: int) -> Dict[str, Any]:
 
     return config.BADGE_LEVELS[0]
 
+# Seconds per unit used in the "try again" hint for each limit window
+_COOLDOWN_WAIT_UNITS = {"minute": (1, "seconds"), "hour": (60, "minutes"), "day": (3600, "hours")}
+
+def _cooldown_message(badge: Dict[str, Any], period: str, limit, until: datetime, now: datetime) -> str:
+    divisor, unit = _COOLDOWN_WAIT_UNITS[period]
+    left = int((until - now).total_seconds() / divisor)
+    return f"⏳ Slow down a bit\n\n🏅 Badge: {badge['emoji']} {badge['name']}\n📨 Limit: {limit} / {period}\n⏱ Try again in {left} {unit}\n\nInvite friends to unlock higher badges 🚀"
+
 def check_and_increment_cooldown(telegram_id: int) -> Optional[str]:
+    now = datetime.utcnow()
+    block = persistence.get_cooldown_block(telegram_id)
+    if block:
+        until, badge, period, limit = block
+        if now < until:
+            return _cooldown_message(badge, period, limit, until, now)
+        persistence.clear_cooldown_blocks(telegram_id)
+
     user = persistence.get_tg_user(telegram_id)
     if user and int(user.get('is_banned', 0)) == 1:
         return "You are banned."
-    badge = get_user_badge(telegram_id)
+    badge = badge_for_user(telegram_id, user)
     if badge['name'] == 'Admin':
         persistence.increment_tg_request_count(telegram_id)
         return None
 
     limits = badge['limits']
-    now = datetime.utcnow()
     rl = persistence.get_rate_limits(telegram_id)
 
     if rl.get('minute_reset') is None:
@@ -91,15 +116,12 @@ def check_and_increment_cooldown(telegram_id: int) -> Optional[str]:
         rl['day_count'] = 0
         rl['day_reset'] = now + timedelta(days=1)
 
-    if isinstance(limits.get('min'), (int, float)) and rl['minute_count'] >= limits['min']:
-        seconds_left = int((rl['minute_reset'] - now).total_seconds())
-        return f"⏳ Slow down a bit\n\n🏅 Badge: {badge['emoji']} {badge['name']}\n📨 Limit: {limits['min']} / minute\n⏱ Try again in {seconds_left} seconds\n\nInvite friends to unlock higher badges 🚀"
-    if isinstance(limits.get('hour'), (int, float)) and rl['hour_count'] >= limits['hour']:
-        minutes_left = int((rl['hour_reset'] - now).total_seconds() / 60)
-        return f"⏳ Slow down a bit\n\n🏅 Badge: {badge['emoji']} {badge['name']}\n📨 Limit: {limits['hour']} / hour\n⏱ Try again in {minutes_left} minutes\n\nInvite friends to unlock higher badges 🚀"
-    if isinstance(limits.get('day'), (int, float)) and rl['day_count'] >= limits['day']:
-        hours_left = int((rl['day_reset'] - now).total_seconds() / 3600)
-        return f"⏳ Slow down a bit\n\n🏅 Badge: {badge['emoji']} {badge['name']}\n📨 Limit: {limits['day']} / day\n⏱ Try again in {hours_left} hours\n\nInvite friends to unlock higher badges 🚀"
+    for period, key in (("minute", "min"), ("hour", "hour"), ("day", "day")):
+        limit = limits.get(key)
+        if isinstance(limit, (int, float)) and rl[f'{period}_count'] >= limit:
+            until = rl[f'{period}_reset']
+            persistence.set_cooldown_block(telegram_id, (until, badge, period, limit))
+            return _cooldown_message(badge, period, limit, until, now)
 
     if isinstance(limits.get('day'), (int, float)) and rl['day_count'] > limits['day'] * 2:
         rl['day_count'] = limits['day']
@@ -117,10 +139,14 @@ def check_and_increment_cooldown(telegram_id: int) -> Optional[str]:
 
 # ================ ADMIN HELPERS ================
 def get_user_stats(telegram_id: int) -> Dict[str, Any]:
-    user = persistence.get_tg_user(telegram_id) or {}
-    badge = get_user_badge(telegram_id)
-    rl = persistence.get_rate_limits(telegram_id)
-    saves = persistence.count_saved_accounts(telegram_id)
+    row = persistence.get_user_stats_row(telegram_id)
+    if row is None:
+        user, rl, saves = {}, persistence.default_rate_limits(telegram_id), 0
+    else:
+        rl = row.pop('_rate_limits', None) or persistence.default_rate_limits(telegram_id)
+        saves = int(row.pop('_save_count', 0) or 0)
+        user = row
+    badge = badge_for_user(telegram_id, user)
     return {
         'user': user,
         'badge': badge,